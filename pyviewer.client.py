@@ -2,6 +2,7 @@ import os
 # Force Qt to use the X11 backend (for XWayland compatibility on Wayland sessions)
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 
+import re
 import sys
 import socket
 import threading
@@ -10,21 +11,28 @@ import subprocess
 import shutil
 import time
 import json
+from collections import deque
+from importlib import util as _importlib_util
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLineEdit, QLabel, QTextEdit, QFrame, QMessageBox, QStackedLayout,
-    QDockWidget, QSizePolicy
+    QDockWidget, QSizePolicy, QStyleFactory
+)
+from PyQt6.QtCore import (
+    QObject, QThread, QThreadPool, QRunnable, QSocketNotifier, pyqtSignal,
+    Qt, QTimer, QPointF, QRectF, QEvent
+)
+from PyQt6.QtGui import (
+    QImage, QPixmap, QWindow, QColor, QFont, QFontDatabase, QPalette,
+    QTextCharFormat, QTextCursor
 )
-from PyQt6.QtCore import QObject, QThread, pyqtSignal, Qt, QTimer, QPointF, QRectF, QEvent
-from PyQt6.QtGui import QImage, QPixmap, QWindow
 
 # --- Check for optional PyAudio library for legacy audio ---
-try:
-    import pyaudio
-    PYAUDIO_SUPPORT = True
-except ImportError:
-    PYAUDIO_SUPPORT = False
+# Probed without importing: pyaudio links PortAudio and xcffib loads the
+# xcb bindings, neither of which is needed to get the window on screen.
+# The actual imports happen on first use (audio playback / embedding).
+PYAUDIO_SUPPORT = _importlib_util.find_spec("pyaudio") is not None
 
 # --- Remote Control Imports ---
 try:
@@ -33,13 +41,134 @@ try:
 except ImportError:
     PYNPUT_SUPPORT = False
 
+if PYNPUT_SUPPORT:
+    # str(Button.left) / str(Key.shift) re-format the same handful of
+    # strings on every click and key event; precompute them once.
+    _BUTTON_STR = {button: str(button) for button in mouse.Button}
+    _KEY_STR = {key: str(key) for key in keyboard.Key}
+else:
+    _BUTTON_STR = {}
+    _KEY_STR = {}
+
+# --- Check for optional xcffib for event-driven window embedding ---
+XCFFIB_SUPPORT = _importlib_util.find_spec("xcffib") is not None
+
 # --- Configuration ---
 CHUNK = 1024
-FORMAT = pyaudio.paInt16 if PYAUDIO_SUPPORT else None
 CHANNELS = 2
 RATE = 48000
 FFPLAY_WINDOW_TITLE = "Remote Stream"
 CONTROL_PORT = 9998
+# Video-stream reads should grab as much as the kernel has queued; at
+# 5-15 Mbps a 4 KiB recv means hundreds of syscalls per second.
+VIDEO_RECV_SIZE = 262144
+
+# --- Binary control protocol ---
+# Control events go out as fixed opcode frames packed with prebuilt Structs
+# instead of newline-delimited JSON: a mouse move is 9 bytes instead of ~60
+# and costs one pack instead of a json.dumps. Opcode 0x00 is a
+# length-prefixed JSON escape hatch for anything without a fixed frame.
+# The server decoder mirrors these definitions.
+OP_JSON = 0x00
+OP_MOUSE_MOVE = 0x01
+OP_MOUSE_CLICK = 0x02
+OP_MOUSE_SCROLL = 0x03
+OP_KEY_CHAR = 0x04
+OP_KEY_NAME = 0x05
+OP_TYPE_TEXT = 0x10
+
+_MOVE_STRUCT = struct.Struct('>Bff')       # op, rel_x, rel_y
+_CLICK_STRUCT = struct.Struct('>BBB')      # op, button id, pressed
+_SCROLL_STRUCT = struct.Struct('>Bii')     # op, dx, dy
+_KEYCHAR_STRUCT = struct.Struct('>BBI')    # op, pressed, codepoint
+_KEYNAME_HDR = struct.Struct('>BBB')       # op, pressed, name length
+_JSON_HDR = struct.Struct('>BI')           # op, payload length
+_TYPE_HDR = struct.Struct('>BI')           # op, utf-8 text length
+
+# Legacy mode multiplexes video and audio over the one stream socket;
+# every frame is a 1-byte type tag plus a '>I' length prefix. Frames
+# arrive in interleave order, which also keeps A/V roughly in sync.
+TAG_VIDEO = ord('V')
+TAG_AUDIO = ord('A')
+_TAG_STRUCT = struct.Struct('>BI')         # tag, payload length
+
+_BUTTON_IDS = {'left': 1, 'middle': 2, 'right': 3}
+
+class _FrameDecodeTask(QRunnable):
+    """Decodes one JPEG frame on the worker's thread pool.
+
+    QPixmap construction is GUI-thread-only, so the pool stops at QImage;
+    the GUI slot does the pixmap conversion and scaling.
+    """
+
+    def __init__(self, worker, jpeg_bytes):
+        super().__init__()
+        self._worker = worker
+        self._jpeg = jpeg_bytes
+
+    def run(self):
+        try:
+            q_image = QImage.fromData(self._jpeg, "JPG")
+            if not q_image.isNull():
+                self._worker.legacy_frame_signal.emit(q_image)
+        finally:
+            with self._worker._inflight_lock:
+                self._worker._inflight -= 1
+
+
+def tune_socket(sock, rcvbuf=None, quickack=False):
+    """Applies low-latency TCP options to a connected socket.
+
+    Disables Nagle so small control frames leave immediately; optionally
+    widens the receive buffer for the video stream and enables QUICKACK so
+    delayed ACKs don't throttle the sender between frames.
+    """
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+    if rcvbuf:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+    if quickack and hasattr(socket, 'TCP_QUICKACK'):
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except OSError:
+            pass
+
+def encode_control_event(event_type, data):
+    """Encodes one control event into its binary frame.
+
+    Falls back to the JSON frame for anything the fixed opcodes don't
+    cover (extra mouse buttons, multi-character keys).
+    """
+    if event_type == 'mouse_move':
+        return _MOVE_STRUCT.pack(OP_MOUSE_MOVE, data['rel_x'], data['rel_y'])
+    if event_type == 'mouse_click':
+        button_id = _BUTTON_IDS.get(data['button'].rpartition('.')[2])
+        if button_id is not None:
+            return _CLICK_STRUCT.pack(OP_MOUSE_CLICK, button_id, int(data['pressed']))
+    elif event_type == 'mouse_scroll':
+        return _SCROLL_STRUCT.pack(OP_MOUSE_SCROLL, int(data['dx']), int(data['dy']))
+    elif event_type == 'type_text':
+        # Whole clipboard pastes travel as one length-prefixed blob, not
+        # per-character key frames.
+        utf8 = data['text'].encode('utf-8')
+        return _TYPE_HDR.pack(OP_TYPE_TEXT, len(utf8)) + utf8
+    elif event_type in ('keyboard_press', 'keyboard_release'):
+        pressed = int(event_type == 'keyboard_press')
+        char = data.get('char')
+        if char is not None and len(char) == 1:
+            return _KEYCHAR_STRUCT.pack(OP_KEY_CHAR, pressed, ord(char))
+        name = data.get('name')
+        if name:
+            name_bytes = name.rpartition('.')[2].encode('ascii', errors='ignore')
+            if 0 < len(name_bytes) <= 255:
+                return _KEYNAME_HDR.pack(OP_KEY_NAME, pressed, len(name_bytes)) + name_bytes
+    payload = json.dumps({"type": event_type, "data": data}).encode('utf-8')
+    return _JSON_HDR.pack(OP_JSON, len(payload)) + payload
 
 
 class Worker(QObject):
@@ -50,8 +179,6 @@ class Worker(QObject):
     disconnected_signal = pyqtSignal()
     legacy_frame_signal = pyqtSignal(QImage)
     ffmpeg_ready_to_embed_signal = pyqtSignal()
-    # Generic signal to send any type of control event
-    send_control_event_signal = pyqtSignal(str, dict)
 
     def __init__(self, host, port):
         super().__init__()
@@ -59,14 +186,33 @@ class Worker(QObject):
         self.port = port
         self.mode = None
         self.control_socket = None
-        self.audio_socket = None
         self.control_socket_client = None
         self.ffplay_process = None
         self.stop_event = threading.Event()
         self._stop_control_send_event = threading.Event()
 
-        # Connect the signal to the internal sending method
-        self.send_control_event_signal.connect(self._send_control_event)
+        # Outbound control frames are appended here and flushed as one
+        # sendall per timer tick, so a typing or click burst costs one
+        # syscall instead of one per event.
+        self._out_buf = bytearray()
+        self._out_lock = threading.Lock()
+
+        # Receive buffer reused across legacy frames; grows on demand.
+        self._recv_buf = bytearray(1 << 20)
+
+        # Audio chunks demultiplexed off the stream socket, bounded so a
+        # stalled playback device can't queue unbounded latency.
+        self._audio_chunks = deque(maxlen=16)
+        self._audio_cond = threading.Condition()
+
+        # JPEG decoding runs on a small pool so the receive loop never
+        # blocks behind the GUI. At most two frames may be in flight;
+        # beyond that, new frames are dropped rather than queued — for a
+        # live stream, freshness beats completeness.
+        self._decode_pool = QThreadPool()
+        self._decode_pool.setMaxThreadCount(2)
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
 
     def connect_and_run(self):
         """Main entry point for the worker thread."""
@@ -91,6 +237,7 @@ class Worker(QObject):
         try:
             self.control_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.control_socket.connect((self.host, self.port))
+            tune_socket(self.control_socket, rcvbuf=1 << 20, quickack=True)
             self.update_status_signal.emit(f"[*] Connected to server at {self.host}:{self.port}", False)
 
             mode_byte = self.control_socket.recv(1)
@@ -99,10 +246,9 @@ class Worker(QObject):
             self.mode = mode_byte.decode()
 
             if self.mode == 'L':
-                self.update_status_signal.emit("[*] Server is in Legacy mode. Connecting for audio...", False)
-                self.audio_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.audio_socket.connect((self.host, self.port + 1))
-                self.update_status_signal.emit("[*] Legacy audio socket connected.", False)
+                # Audio arrives interleaved with video on this socket as
+                # tagged frames; there is no second connection to open.
+                self.update_status_signal.emit("[*] Server is in Legacy mode.", False)
             elif self.mode == 'F':
                 self.update_status_signal.emit("[*] Server is in FFmpeg mode.", False)
             return True
@@ -116,6 +262,7 @@ class Worker(QObject):
         try:
             self.control_socket_client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.control_socket_client.connect((self.host, CONTROL_PORT))
+            tune_socket(self.control_socket_client)
             self.update_status_signal.emit(f"[*] Connected to remote control server at {self.host}:{CONTROL_PORT}", False)
             self._stop_control_send_event.clear()
             return True
@@ -123,17 +270,33 @@ class Worker(QObject):
             self.update_status_signal.emit(f"[!] Remote control connection failed: {e}", True)
             return False
 
-    def _send_control_event(self, event_type, data):
-        """Sends a JSON-formatted control event (mouse, keyboard) to the server."""
+    def submit_event(self, event_type, data):
+        """Queues a binary-framed control event for the next flush.
+
+        Safe to call from any thread — the pynput listener threads call
+        this directly, skipping the queued-signal round trip through the
+        worker's event loop; only the bytearray append is locked.
+        """
         if self.control_socket_client and not self._stop_control_send_event.is_set():
-            try:
-                message = json.dumps({"type": event_type, "data": data}) + "\n"
-                self.control_socket_client.sendall(message.encode('utf-8'))
-            except (BrokenPipeError, ConnectionResetError, OSError) as e:
-                self.update_status_signal.emit(f"[*] Control socket send error: {e}. Remote control disconnected.", False)
-                self._stop_control_send_event.set()
-            except Exception as e:
-                self.update_status_signal.emit(f"[!] Error sending control event: {e}", True)
+            with self._out_lock:
+                self._out_buf += encode_control_event(event_type, data)
+
+    def flush_control_events(self):
+        """Sends every queued control frame in a single syscall."""
+        if not self.control_socket_client or self._stop_control_send_event.is_set():
+            return
+        with self._out_lock:
+            if not self._out_buf:
+                return
+            buf = bytes(self._out_buf)
+            self._out_buf.clear()
+        try:
+            self.control_socket_client.sendall(buf)
+        except (BrokenPipeError, ConnectionResetError, OSError) as e:
+            self.update_status_signal.emit(f"[*] Control socket send error: {e}. Remote control disconnected.", False)
+            self._stop_control_send_event.set()
+        except Exception as e:
+            self.update_status_signal.emit(f"[!] Error sending control event: {e}", True)
 
     def _handle_ffmpeg_stream(self):
         """Starts an ffplay process and pipes video data from the server into it."""
@@ -162,26 +325,68 @@ class Worker(QObject):
             )
             self.ffmpeg_ready_to_embed_signal.emit()
 
-            while not self.stop_event.is_set():
-                data = self.control_socket.recv(CHUNK * 4)
-                if not data:
+            # A bounded ring sits between the socket and ffplay's stdin so a
+            # decoder hiccup never stalls the recv (and with it the TCP
+            # window). When the ring is full the oldest chunk is dropped —
+            # a brief glitch beats a stalled live stream.
+            stdin_fd = self.ffplay_process.stdin.fileno()
+            recv_buf = bytearray(VIDEO_RECV_SIZE)
+            recv_view = memoryview(recv_buf)
+            chunks = deque(maxlen=32)
+            chunks_cond = threading.Condition()
+            pump_failed = threading.Event()
+            threading.Thread(
+                target=self._pump_ffplay_stdin,
+                args=(stdin_fd, chunks, chunks_cond, pump_failed),
+                daemon=True
+            ).start()
+            while not self.stop_event.is_set() and not pump_failed.is_set():
+                received = self.control_socket.recv_into(recv_buf)
+                if not received:
                     self.update_status_signal.emit("[*] Stream ended.", False)
                     break
                 if self.ffplay_process.poll() is not None:
                     if not self.stop_event.is_set():
                         self.update_status_signal.emit("[!] ffplay process exited unexpectedly.", True)
                     break
-                try:
-                    self.ffplay_process.stdin.write(data)
-                except (BrokenPipeError, OSError):
-                    if not self.stop_event.is_set():
-                        self.update_status_signal.emit("[!] Broken pipe to ffplay.", True)
-                    break
+                with chunks_cond:
+                    chunks.append(bytes(recv_view[:received]))
+                    chunks_cond.notify()
+            with chunks_cond:
+                chunks.append(None)
+                chunks_cond.notify()
         finally:
             self.disconnect()
 
+    def _pump_ffplay_stdin(self, stdin_fd, chunks, cond, failed):
+        """Consumer side of the video ring: writes queued chunks to ffplay.
+
+        Runs on its own thread so a stall in ffplay's stdin never blocks
+        the socket recv loop. A None chunk is the shutdown sentinel.
+        """
+        while True:
+            with cond:
+                while not chunks:
+                    if self.stop_event.is_set():
+                        return
+                    cond.wait(0.5)
+                data = chunks.popleft()
+            if data is None:
+                return
+            try:
+                view = memoryview(data)
+                written = 0
+                while written < len(data):
+                    written += os.write(stdin_fd, view[written:])
+            except (BrokenPipeError, OSError):
+                if not self.stop_event.is_set():
+                    self.update_status_signal.emit("[!] Broken pipe to ffplay.", True)
+                failed.set()
+                return
+
     def _handle_legacy_stream(self):
-        """Handles the old-style streaming method (JPEG frames + raw audio)."""
+        """Handles the old-style streaming method: one socket carrying
+        tagged, length-prefixed JPEG and PCM frames."""
         if PYAUDIO_SUPPORT:
             audio_thread = threading.Thread(target=self._play_legacy_audio, daemon=True)
             audio_thread.start()
@@ -190,24 +395,51 @@ class Worker(QObject):
 
         try:
             while not self.stop_event.is_set():
-                img_size_data = self._recv_all(self.control_socket, 4)
-                if not img_size_data: break
-                img_size = struct.unpack('>I', img_size_data)[0]
-                img_data = self._recv_all(self.control_socket, img_size)
-                if not img_data: break
-                q_image = QImage.fromData(img_data, "JPG")
-                self.legacy_frame_signal.emit(q_image)
+                header = self._recv_all(self.control_socket, _TAG_STRUCT.size)
+                if not header: break
+                tag, size = _TAG_STRUCT.unpack_from(header)
+                payload = self._recv_all(self.control_socket, size)
+                if not payload: break
+                if tag == TAG_VIDEO:
+                    with self._inflight_lock:
+                        if self._inflight >= 2:
+                            continue  # Decoders are behind; drop the frame.
+                        self._inflight += 1
+                    self._decode_pool.start(_FrameDecodeTask(self, bytes(payload)))
+                elif tag == TAG_AUDIO:
+                    with self._audio_cond:
+                        self._audio_chunks.append(bytes(payload))
+                        self._audio_cond.notify()
+                else:
+                    self.update_status_signal.emit(
+                        f"[!] Unknown stream frame tag 0x{tag:02x}; stream desynced.", True)
+                    break
         finally:
+            with self._audio_cond:
+                self._audio_chunks.append(None)
+                self._audio_cond.notify()
             self.disconnect()
 
     def _play_legacy_audio(self):
-        """Plays raw audio data received from the legacy server."""
+        """Plays PCM chunks demultiplexed from the stream socket.
+
+        The receive loop drops whole tagged frames into the bounded audio
+        deque; this thread only waits on the condition and writes to
+        PyAudio. A None chunk is the shutdown sentinel.
+        """
+        import pyaudio  # Deferred: links PortAudio, only needed here
         p = pyaudio.PyAudio()
-        stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE, output=True, frames_per_buffer=CHUNK)
+        stream = p.open(format=pyaudio.paInt16, channels=CHANNELS, rate=RATE, output=True, frames_per_buffer=CHUNK)
         try:
             while not self.stop_event.is_set():
-                audio_data = self.audio_socket.recv(CHUNK)
-                if not audio_data: break
+                with self._audio_cond:
+                    while not self._audio_chunks:
+                        if self.stop_event.is_set():
+                            return
+                        self._audio_cond.wait(0.5)
+                    audio_data = self._audio_chunks.popleft()
+                if audio_data is None:
+                    return
                 stream.write(audio_data)
         finally:
             stream.stop_stream()
@@ -215,16 +447,26 @@ class Worker(QObject):
             p.terminate()
 
     def _recv_all(self, sock, n):
-        """Helper function to ensure all n bytes are received from a socket."""
-        data = bytearray()
-        while len(data) < n:
+        """Receives exactly n bytes into the worker's reused buffer.
+
+        recv_into fills a preallocated bytearray, so no per-packet bytes
+        objects or final whole-frame copy are made. Returns a memoryview
+        over the buffer (valid until the next call) or None if the
+        connection closed.
+        """
+        if len(self._recv_buf) < n:
+            self._recv_buf = bytearray(max(n, len(self._recv_buf) * 2))
+        view = memoryview(self._recv_buf)
+        got = 0
+        while got < n:
             try:
-                packet = sock.recv(n - len(data))
-                if not packet: return None
-                data.extend(packet)
+                received = sock.recv_into(view[got:n])
             except OSError:
                 return None
-        return bytes(data)
+            if not received:
+                return None
+            got += received
+        return view[:n]
 
     def toggle_mute(self):
         """Toggles mute on the ffplay process by writing 'm' to its stdin."""
@@ -249,7 +491,7 @@ class Worker(QObject):
                 except subprocess.TimeoutExpired:
                     self.ffplay_process.kill()
             # Safely close all sockets
-            for sock in [self.control_socket, self.audio_socket, self.control_socket_client]:
+            for sock in [self.control_socket, self.control_socket_client]:
                 if sock:
                     try:
                         sock.close()
@@ -257,6 +499,140 @@ class Worker(QObject):
                         pass
 
 
+# Theme colors in one place; the QSS templates below pull from here so a
+# theme tweak touches a single dict instead of every rule that repeats a
+# shade.
+_PALETTE = {
+    "bg": "#2c3e50",
+    "panel": "#34495e",
+    "text": "#ecf0f1",
+    "accent": "#3498db",
+    "accent_hover": "#2980b9",
+    "accent_pressed": "#1f618d",
+    "disabled_bg": "#566573",
+    "disabled_text": "#95a5a6",
+    "danger": "#e74c3c",
+    "danger_hover": "#c0392b",
+    "log_bg": "#1e2b37",
+}
+
+# QSS template for the modern dark theme, formatted against _PALETTE
+# once at import so every window shares one string object instead of
+# re-materializing the literal (and re-keying Qt's stylesheet cache) per
+# call. The themable copy ships as dark.qss next to the script; this
+# embedded copy is the fallback so the client still runs from a bare
+# download.
+_QSS_TEMPLATE = """
+        QMainWindow {
+            background-color: %(bg)s;
+        }
+        QDockWidget::title {
+            text-align: left;
+            background: %(panel)s;
+            padding: 5px;
+            padding-left: 10px;
+            color: white;
+            font-weight: bold;
+        }
+        QWidget#topBar {
+            background-color: %(panel)s;
+            border-bottom: 1px solid %(bg)s;
+        }
+        QLabel {
+            color: %(text)s;
+            padding: 5px;
+        }
+        QLineEdit {
+            background-color: %(bg)s;
+            color: %(text)s;
+            border: 1px solid %(panel)s;
+            border-radius: 4px;
+            padding: 5px;
+        }
+        QLineEdit:focus {
+            border: 1px solid %(accent)s;
+        }
+        QPushButton {
+            background-color: %(accent)s;
+            color: white;
+            border: none;
+            padding: 8px 16px;
+            border-radius: 4px;
+            font-weight: bold;
+        }
+        QPushButton:hover {
+            background-color: %(accent_hover)s;
+        }
+        QPushButton:pressed {
+            background-color: %(accent_pressed)s;
+        }
+        QPushButton:disabled {
+            background-color: %(disabled_bg)s;
+            color: %(disabled_text)s;
+        }
+        QPushButton[danger="true"] {
+            background-color: %(danger)s;
+        }
+        QPushButton[danger="true"]:hover {
+            background-color: %(danger_hover)s;
+        }
+        QTextEdit {
+            background-color: %(log_bg)s;
+            color: %(text)s;
+            border: 1px solid %(panel)s;
+        }
+        QMessageBox QPushButton {
+            min-width: 80px;
+        }
+        """
+
+_EMBEDDED_QSS = _QSS_TEMPLATE % _PALETTE
+
+def _minify_qss(qss):
+    """Strips comments and collapses whitespace from a QSS string.
+
+    Qt's stylesheet parser can't be pre-run and its compiled form
+    serialized from Python, so the next best saving is handing it a
+    minimal token stream — the indentation and blank lines in the
+    readable source roughly double the tokenizer's input for nothing.
+    """
+    qss = re.sub(r'/\*.*?\*/', '', qss, flags=re.S)
+    return ' '.join(qss.split())
+
+def _load_stylesheet():
+    """Reads dark.qss from beside the script, once at import.
+
+    PyQt6 ships no rcc tool, so instead of a compiled resource bundle the
+    theme lives in a plain file that can be edited without touching code;
+    a missing or unreadable file falls back to the embedded copy.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dark.qss')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return _EMBEDDED_QSS
+
+_MODERN_QSS = _minify_qss(_load_stylesheet())
+
+# Minimal sheet for systems already running a dark palette: only the
+# rules the native style can't provide (danger button, log colors), so
+# most widgets stay on the fast native-style path instead of
+# QStyleSheetStyle.
+_DARK_OVERRIDE_QSS = _minify_qss("""
+        QPushButton[danger="true"] {
+            background-color: %(danger)s;
+        }
+        QPushButton[danger="true"]:hover {
+            background-color: %(danger_hover)s;
+        }
+        QTextEdit {
+            background-color: %(log_bg)s;
+            color: %(text)s;
+        }
+        """ % _PALETTE)
+
+
 class ClientWindow(QMainWindow):
     """The main application window."""
 
@@ -272,11 +648,40 @@ class ClientWindow(QMainWindow):
         # --- State Attributes ---
         self.is_window_active = False
         self.is_muted = False # Keep for internal state tracking if mute ever returns
+        self._clipboard_cache = ""
         self.video_aspect_ratio = 16.0 / 9.0  # Default, updated on first frame
 
+        # Legacy-frame scaling cache: (label w/h, source w/h) -> target size.
+        self._scaled_cache_key = None
+        self._scaled_target_size = None
+
+        # Video-rect cache for on_move, which fires at hundreds of Hz but
+        # whose geometry only changes on resize or aspect-ratio change.
+        # The reciprocals turn the per-event divisions into multiplies.
+        self._cached_video_rect = None
+        self._cached_widget_size = None
+        self._inv_video_width = 0.0
+        self._inv_video_height = 0.0
+
         # --- Remote Control Listeners ---
         self.mouse_listener = None
         self.keyboard_listener = None
+        self._listeners_wanted = False  # True while a session wants input forwarded
+
+        # --- xcb window watch for ffplay embedding ---
+        self._xcb_conn = None
+        self._xcb_notifier = None
+        self._xcb_root = None
+        self._xcb_atoms = None
+
+        # Mouse moves arrive from pynput at hundreds of Hz; only the latest
+        # absolute position matters, so moves are parked here and a ~60 Hz
+        # timer forwards the newest one instead of crossing the thread
+        # boundary (and the network) per pixel.
+        self._pending_move = None
+        self._move_timer = QTimer(self)
+        self._move_timer.setInterval(16)
+        self._move_timer.timeout.connect(self._flush_pending_move)
 
         self._setup_ui()
         self._setup_connections()
@@ -290,7 +695,6 @@ class ClientWindow(QMainWindow):
         """Initializes the entire user interface."""
         self.setWindowTitle("PyQt6 Remote Desktop Client")
         self.setGeometry(100, 100, 1024, 768)
-        self.setStyleSheet(self.get_modern_stylesheet())
 
         # --- Main Layout ---
         central_widget = QWidget()
@@ -353,6 +757,11 @@ class ClientWindow(QMainWindow):
         self.fullscreen_button.setDefault(False)     # Disable default
         self.fullscreen_button.setFocusPolicy(Qt.FocusPolicy.NoFocus) # Prevent focus by keyboard
 
+        self.clipboard_button = QPushButton("📋 Send Clipboard")
+        self.clipboard_button.setAutoDefault(False) # Disable auto-default
+        self.clipboard_button.setDefault(False)     # Disable default
+        self.clipboard_button.setFocusPolicy(Qt.FocusPolicy.NoFocus) # Prevent focus by keyboard
+
         self.logs_button = QPushButton("📖 Show Logs")
         self.logs_button.setAutoDefault(False) # Disable auto-default
         self.logs_button.setDefault(False)     # Disable default
@@ -363,11 +772,13 @@ class ClientWindow(QMainWindow):
         self.exit_button.setDefault(False)     # Disable default
         self.exit_button.setFocusPolicy(Qt.FocusPolicy.NoFocus) # Prevent focus by keyboard
 
-        # Style the exit button differently to indicate its function
-        self.exit_button.setObjectName("exitButton")
+        # Style the exit button differently to indicate its function. A
+        # dynamic property keeps the danger styling reusable without
+        # another id-specific selector chain in the stylesheet.
+        self.exit_button.setProperty("danger", True)
 
         utility_buttons = [
-            self.fullscreen_button,
+            self.fullscreen_button, self.clipboard_button,
             self.logs_button, self.exit_button
         ]
         for btn in utility_buttons:
@@ -377,10 +788,30 @@ class ClientWindow(QMainWindow):
         """Creates the dockable window for status logs."""
         self.log_dock = QDockWidget("Logs", self)
         self.log_dock.setObjectName("logDock")
+        # Movable only: visibility is driven by the Logs button, and with
+        # no title-bar buttons the stylesheet needs no url(none) icon
+        # rules, which hit Qt's uncached image lookup on every polish.
+        self.log_dock.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetMovable)
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.log_dock)
 
         self.status_log = QTextEdit()
         self.status_log.setReadOnly(True)
+        # Resolve the log font once here instead of leaving a font-family
+        # fallback list in the QSS, which Qt walks per text layout pass.
+        families = set(QFontDatabase.families(QFontDatabase.WritingSystem.Latin))
+        for name in ("Consolas", "Courier New", "DejaVu Sans Mono"):
+            if name in families:
+                self.status_log.setFont(QFont(name, 10))
+                break
+        else:
+            self.status_log.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        # Bound the document and log with prebuilt character formats:
+        # appending HTML would run Qt's HTML parser on every line.
+        self.status_log.document().setMaximumBlockCount(500)
+        self._fmt_err = QTextCharFormat()
+        self._fmt_err.setForeground(QColor("#ff4c4c"))
+        self._fmt_ok = QTextCharFormat()
+        self._fmt_ok.setForeground(QColor("#25be40"))
 
         container = QWidget()
         layout = QVBoxLayout(container)
@@ -417,6 +848,13 @@ class ClientWindow(QMainWindow):
 
         # Utility button connections
         self.fullscreen_button.clicked.connect(self.toggle_fullscreen)
+        self.clipboard_button.clicked.connect(self.send_clipboard)
+
+        # Prefetch clipboard text whenever it changes: reading it on
+        # demand is a synchronous round-trip to the owning application on
+        # X11 and can stall the GUI thread for hundreds of ms.
+        QApplication.clipboard().dataChanged.connect(self._on_clipboard_changed)
+        self._on_clipboard_changed()
         self.logs_button.clicked.connect(self.toggle_logs)
         self.exit_button.clicked.connect(self.confirm_exit)
 
@@ -426,8 +864,8 @@ class ClientWindow(QMainWindow):
         if sys.platform == "linux":
             # The client is configured to use XWayland via QT_QPA_PLATFORM=xcb
             # No specific Wayland warning needed here, as it's intended to use X11 utilities via XWayland.
-            if not shutil.which('wmctrl'):
-                warnings.append("'wmctrl' is not installed, but it is required for embedding the video in FFmpeg mode on Linux (including XWayland).")
+            if not XCFFIB_SUPPORT and not shutil.which('wmctrl'):
+                warnings.append("Neither 'xcffib' nor 'wmctrl' is installed; one of them is required for embedding the video in FFmpeg mode on Linux (including XWayland).")
         if not shutil.which('ffplay'):
             warnings.append("ffplay was not found in your system's PATH. FFmpeg mode will be unavailable.")
         if not PYAUDIO_SUPPORT:
@@ -480,6 +918,7 @@ class ClientWindow(QMainWindow):
         self.connect_button.setEnabled(True)
         self.disconnect_button.setEnabled(False)
         self.stop_control_listeners()
+        self._xcb_cleanup()
 
         if self.thread and self.thread.isRunning():
             self.thread.quit()
@@ -520,6 +959,30 @@ class ClientWindow(QMainWindow):
             self.showFullScreen()
             self.fullscreen_button.setText("Exit Fullscreen")
 
+    def _on_clipboard_changed(self):
+        """Caches the clipboard text so send_clipboard never blocks."""
+        try:
+            self._clipboard_cache = QApplication.clipboard().text()
+        except Exception:
+            self._clipboard_cache = ""
+
+    def send_clipboard(self):
+        """Types the cached local clipboard text on the remote machine.
+
+        The whole text goes out as a single length-prefixed frame, so a
+        large paste costs one queued send rather than one frame per
+        character.
+        """
+        if self.worker is None:
+            return
+        text = self._clipboard_cache
+        if not text:
+            self.update_status("[*] Clipboard is empty; nothing to send.", False)
+            return
+        self.worker.submit_event('type_text', {'text': text})
+        self.worker.flush_control_events()
+        self.update_status(f"[*] Sent {len(text)} clipboard characters to remote.", False)
+
     def toggle_logs(self):
         """Shows or hides the log dock."""
         is_visible = self.log_dock.isVisible()
@@ -529,24 +992,52 @@ class ClientWindow(QMainWindow):
     # --- UI Update and Event Handling ---
 
     def update_status(self, message, is_error):
-        color = "#ff4c4c" if is_error else "#25be40" # Red for error, Green for success
-        self.status_log.append(f'<span style="color:{color};">{message}</span>')
+        # Red for error, Green for success
+        cursor = self.status_log.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(message + '\n', self._fmt_err if is_error else self._fmt_ok)
 
     def update_legacy_frame(self, q_image):
         try:
             if self.video_layout.currentWidget() != self.legacy_video_label:
                 self.video_layout.setCurrentWidget(self.legacy_video_label)
 
-            if q_image.height() > 0:
-                self.video_aspect_ratio = q_image.width() / q_image.height()
-
-            # Scale pixmap to fit the label while maintaining aspect ratio
+            # The JPEG was already decoded on the worker's pool; only the
+            # pixmap conversion and scale run on the GUI thread.
             pixmap = QPixmap.fromImage(q_image)
-            self.legacy_video_label.setPixmap(pixmap.scaled(
-                self.legacy_video_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            ))
+            if pixmap.height() > 0:
+                aspect_ratio = pixmap.width() / pixmap.height()
+                if aspect_ratio != self.video_aspect_ratio:
+                    self.video_aspect_ratio = aspect_ratio
+                    self._cached_video_rect = None
+
+            # The target size only changes when the label or source does,
+            # so recompute it lazily instead of per frame.
+            label_size = self.legacy_video_label.size()
+            cache_key = (label_size.width(), label_size.height(),
+                         pixmap.width(), pixmap.height())
+            steady = cache_key == self._scaled_cache_key
+            if not steady:
+                self._scaled_cache_key = cache_key
+                self._scaled_target_size = pixmap.size().scaled(
+                    label_size, Qt.AspectRatioMode.KeepAspectRatio)
+
+            if self._scaled_target_size == pixmap.size():
+                self.legacy_video_label.setPixmap(pixmap)
+            else:
+                # Bilinear filtering buys nothing visible on a downsample,
+                # and once source and label sizes are steady frame over
+                # frame the transform is fixed, so the cheap mode holds
+                # there too; the smooth pass only runs on the first frame
+                # after a geometry change that upscales.
+                mode = (Qt.TransformationMode.FastTransformation
+                        if steady or pixmap.width() >= self._scaled_target_size.width()
+                        else Qt.TransformationMode.SmoothTransformation)
+                self.legacy_video_label.setPixmap(pixmap.scaled(
+                    self._scaled_target_size,
+                    Qt.AspectRatioMode.IgnoreAspectRatio,
+                    mode
+                ))
         except RuntimeError:
             pass # Avoids errors if widget is deleted during update
 
@@ -554,6 +1045,13 @@ class ClientWindow(QMainWindow):
         if sys.platform != "linux":
             self.update_status("[*] Window embedding is only supported on Linux/X11 (including XWayland).", False)
             return
+
+        # Prefer watching the window list over polling wmctrl: the window
+        # is embedded as soon as the WM maps it instead of on the next
+        # 500 ms poll, and no subprocess is spawned at all.
+        if XCFFIB_SUPPORT and self._embed_via_xcb():
+            return
+
         if not shutil.which('wmctrl'):
             return
 
@@ -577,36 +1075,159 @@ class ClientWindow(QMainWindow):
                 return
 
             if ffplay_win_id:
-                try:
-                    ffplay_window = QWindow.fromWinId(ffplay_win_id)
-                    if ffplay_window:
-                        embedded_widget = QWidget.createWindowContainer(ffplay_window, self.video_container)
-                        self.video_layout.addWidget(embedded_widget)
-                        self.video_layout.setCurrentWidget(embedded_widget)
-                        self.update_status("[*] Successfully embedded ffplay window.", False)
-                    else:
-                        self.update_status("[!] Failed to wrap ffplay window with QWindow.", True)
-                except Exception as e:
-                    self.update_status(f"[!] Error during window embedding: {e}", True)
+                self._embed_window_id(ffplay_win_id)
             else:
                 QTimer.singleShot(500, _try_embed)
         _try_embed()
 
+    def _embed_window_id(self, ffplay_win_id):
+        """Wraps a found ffplay window id and inserts it into the video layout."""
+        try:
+            ffplay_window = QWindow.fromWinId(ffplay_win_id)
+            if ffplay_window:
+                embedded_widget = QWidget.createWindowContainer(ffplay_window, self.video_container)
+                self.video_layout.addWidget(embedded_widget)
+                self.video_layout.setCurrentWidget(embedded_widget)
+                self.update_status("[*] Successfully embedded ffplay window.", False)
+            else:
+                self.update_status("[!] Failed to wrap ffplay window with QWindow.", True)
+        except Exception as e:
+            self.update_status(f"[!] Error during window embedding: {e}", True)
+
+    def _embed_via_xcb(self):
+        """Finds the ffplay window through xcb instead of polling wmctrl.
+
+        Scans the root window's _NET_CLIENT_LIST once; if ffplay is not up
+        yet, subscribes to property changes on the root window and re-scans
+        from a QSocketNotifier on the xcb connection fd. Returns False if
+        the X server is unreachable so the wmctrl path can take over.
+        """
+        import xcffib.xproto  # Deferred: only loaded once embedding starts
+        try:
+            conn = xcffib.connect()
+            root = conn.get_setup().roots[0].root
+            atoms = {}
+            for name in ('_NET_CLIENT_LIST', '_NET_WM_NAME', 'UTF8_STRING'):
+                atoms[name] = conn.core.InternAtom(
+                    False, len(name), name).reply().atom
+        except Exception:
+            return False
+
+        self._xcb_conn = conn
+        self._xcb_root = root
+        self._xcb_atoms = atoms
+
+        try:
+            conn.core.ChangeWindowAttributes(
+                root, xcffib.xproto.CW.EventMask,
+                [xcffib.xproto.EventMask.PropertyChange])
+            conn.flush()
+            if self._xcb_scan_for_ffplay():
+                self._xcb_cleanup()
+                return True
+        except Exception:
+            self._xcb_cleanup()
+            return False
+
+        self._xcb_notifier = QSocketNotifier(
+            conn.get_file_descriptor(), QSocketNotifier.Type.Read, self)
+        self._xcb_notifier.activated.connect(self._on_xcb_event)
+        # Same overall deadline as the twelve 500 ms wmctrl polls.
+        QTimer.singleShot(6000, self._xcb_give_up)
+        return True
+
+    def _xcb_scan_for_ffplay(self):
+        """Checks the current client list for the ffplay window title."""
+        import xcffib.xproto
+        conn = self._xcb_conn
+        atoms = self._xcb_atoms
+        reply = conn.core.GetProperty(
+            False, self._xcb_root, atoms['_NET_CLIENT_LIST'],
+            xcffib.xproto.Atom.WINDOW, 0, 0xFFFFFFFF).reply()
+        title_bytes = FFPLAY_WINDOW_TITLE.encode('utf-8')
+        for win_id in struct.unpack(f'<{reply.value_len}I', reply.value.buf()):
+            try:
+                name = conn.core.GetProperty(
+                    False, win_id, atoms['_NET_WM_NAME'],
+                    atoms['UTF8_STRING'], 0, 1024).reply()
+            except Exception:
+                continue
+            if title_bytes in bytes(name.value.buf()):
+                self._embed_window_id(win_id)
+                return True
+        return False
+
+    def _on_xcb_event(self):
+        """Drains xcb events and re-scans when the client list changes."""
+        import xcffib.xproto
+        conn = self._xcb_conn
+        if conn is None:
+            return
+        try:
+            changed = False
+            while True:
+                event = conn.poll_for_event()
+                if event is None:
+                    break
+                if (isinstance(event, xcffib.xproto.PropertyNotifyEvent)
+                        and event.atom == self._xcb_atoms['_NET_CLIENT_LIST']):
+                    changed = True
+            if changed and self._xcb_scan_for_ffplay():
+                self._xcb_cleanup()
+        except Exception:
+            self._xcb_cleanup()
+
+    def _xcb_give_up(self):
+        if self._xcb_conn is not None:
+            self.update_status("[!] Could not find ffplay window to embed. Giving up.", True)
+            self._xcb_cleanup()
+
+    def _xcb_cleanup(self):
+        """Tears down the xcb watch (notifier and connection)."""
+        if self._xcb_notifier is not None:
+            self._xcb_notifier.setEnabled(False)
+            self._xcb_notifier.deleteLater()
+            self._xcb_notifier = None
+        if self._xcb_conn is not None:
+            try:
+                self._xcb_conn.disconnect()
+            except Exception:
+                pass
+            self._xcb_conn = None
+
     # --- Global Remote Control Methods ---
 
     def start_control_listeners(self):
-        if not PYNPUT_SUPPORT or self.mouse_listener:
+        if not PYNPUT_SUPPORT or self._listeners_wanted:
             return
+        self._listeners_wanted = True
+        if self._start_pynput_listeners():
+            self._move_timer.start()
+            self.update_status("[*] Remote control listeners started.", False)
+
+    def stop_control_listeners(self):
+        self._listeners_wanted = False
+        self._stop_pynput_listeners()
+        self._move_timer.stop()
+        self._pending_move = None
+
+    def _start_pynput_listeners(self):
+        """Creates and starts fresh pynput listeners (they can't restart)."""
+        if self.mouse_listener:
+            return True
         try:
             self.mouse_listener = mouse.Listener(on_move=self.on_move, on_click=self.on_click, on_scroll=self.on_scroll)
             self.keyboard_listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
             self.mouse_listener.start()
             self.keyboard_listener.start()
-            self.update_status("[*] Remote control listeners started.", False)
+            return True
         except Exception as e:
             self.update_status(f"[!] Failed to start control listeners: {e}", True)
+            self.mouse_listener = None
+            self.keyboard_listener = None
+            return False
 
-    def stop_control_listeners(self):
+    def _stop_pynput_listeners(self):
         if self.mouse_listener:
             self.mouse_listener.stop()
         if self.keyboard_listener:
@@ -627,11 +1248,20 @@ class ClientWindow(QMainWindow):
                 if not focused_widget.geometry().contains(event.pos()):
                     focused_widget.clearFocus()
                     return True # Event handled, stop propagation to prevent re-focusing sometimes
-        # Also track window activation/deactivation for remote control
+        # Track window activation/deactivation for remote control. The
+        # pynput listeners are torn down entirely while the window is in
+        # the background — system-wide input no longer costs even the
+        # short-circuit check per event — and recreated on refocus
+        # (listener objects cannot be restarted once stopped).
         if event.type() == QEvent.Type.WindowActivate:
             self.is_window_active = True
+            if self._listeners_wanted:
+                self._start_pynput_listeners()
         elif event.type() == QEvent.Type.WindowDeactivate:
             self.is_window_active = False
+            if self._listeners_wanted:
+                self._stop_pynput_listeners()
+                self._pending_move = None
 
         return super().eventFilter(obj, event) # Pass other events to the base class event handler
 
@@ -642,29 +1272,36 @@ class ClientWindow(QMainWindow):
         if not video_widget: return
 
         widget_pos = video_widget.mapFromGlobal(QPointF(x, y))
-        video_rect = self.get_video_rect(video_widget.size(), self.video_aspect_ratio)
+        video_rect = self._get_cached_video_rect(video_widget)
 
         if not video_rect.contains(widget_pos): return
+        if not self._inv_video_width: return
 
         relative_pos = widget_pos - video_rect.topLeft()
-        video_width, video_height = video_rect.width(), video_rect.height()
-        if video_width < 1 or video_height < 1: return
+        rel_x = max(0.0, min(1.0, relative_pos.x() * self._inv_video_width))
+        rel_y = max(0.0, min(1.0, relative_pos.y() * self._inv_video_height))
 
-        rel_x = max(0.0, min(1.0, relative_pos.x() / video_width))
-        rel_y = max(0.0, min(1.0, relative_pos.y() / video_height))
+        # Latest position wins; the move timer forwards it on its next tick.
+        self._pending_move = {'rel_x': rel_x, 'rel_y': rel_y}
 
-        data = {'rel_x': rel_x, 'rel_y': rel_y}
-        if self.worker and self.worker.send_control_event_signal:
-             self.worker.send_control_event_signal.emit('mouse_move', data)
+    def _flush_pending_move(self):
+        """Forwards the newest parked mouse move and flushes the worker's
+        outbound control buffer (~60 Hz)."""
+        if self.worker is None:
+            return
+        move = self._pending_move
+        if move is not None:
+            self._pending_move = None
+            self.worker.submit_event('mouse_move', move)
+        self.worker.flush_control_events()
 
     def on_click(self, x, y, button, pressed):
         if not self.is_window_active or self.worker is None: return
         video_widget = self.video_layout.currentWidget()
         if not video_widget or not video_widget.rect().contains(video_widget.mapFromGlobal(QPointF(x, y)).toPoint()):
             return
-        data = {'button': str(button), 'pressed': pressed}
-        if self.worker and self.worker.send_control_event_signal:
-            self.worker.send_control_event_signal.emit('mouse_click', data)
+        data = {'button': _BUTTON_STR.get(button) or str(button), 'pressed': pressed}
+        self.worker.submit_event('mouse_click', data)
 
     def on_scroll(self, x, y, dx, dy):
         if not self.is_window_active or self.worker is None: return
@@ -672,29 +1309,45 @@ class ClientWindow(QMainWindow):
         if not video_widget or not video_widget.rect().contains(video_widget.mapFromGlobal(QPointF(x, y)).toPoint()):
             return
         data = {'dx': dx, 'dy': dy}
-        if self.worker and self.worker.send_control_event_signal:
-            self.worker.send_control_event_signal.emit('mouse_scroll', data)
+        self.worker.submit_event('mouse_scroll', data)
 
     def on_press(self, key):
         if not self.is_window_active or self.worker is None: return
         data = self._pynput_key_to_dict(key)
-        if data and self.worker and self.worker.send_control_event_signal:
-            self.worker.send_control_event_signal.emit('keyboard_press', data)
+        if data:
+            self.worker.submit_event('keyboard_press', data)
 
     def on_release(self, key):
         if not self.is_window_active or self.worker is None: return
         data = self._pynput_key_to_dict(key)
-        if data and self.worker and self.worker.send_control_event_signal:
-            self.worker.send_control_event_signal.emit('keyboard_release', data)
+        if data:
+            self.worker.submit_event('keyboard_release', data)
 
     def _pynput_key_to_dict(self, key):
         """Converts a pynput key object to a serializable dictionary."""
         if isinstance(key, keyboard.Key):
-            return {'name': str(key)}
+            return {'name': _KEY_STR.get(key) or str(key)}
         elif isinstance(key, keyboard.KeyCode) and hasattr(key, 'char'):
             return {'char': key.char}
         return {}
 
+    def _get_cached_video_rect(self, video_widget):
+        """Returns the video rect for the current widget, recomputing only
+        when the widget size or aspect ratio has changed."""
+        size = video_widget.size()
+        if self._cached_video_rect is None or size != self._cached_widget_size:
+            rect = self.get_video_rect(size, self.video_aspect_ratio)
+            self._cached_video_rect = rect
+            self._cached_widget_size = size
+            width, height = rect.width(), rect.height()
+            self._inv_video_width = 1.0 / width if width >= 1 else 0.0
+            self._inv_video_height = 1.0 / height if height >= 1 else 0.0
+        return self._cached_video_rect
+
+    def resizeEvent(self, event):
+        self._cached_video_rect = None
+        super().resizeEvent(event)
+
     def get_video_rect(self, widget_size, video_aspect_ratio):
         """Calculates the actual video area inside a widget, accounting for letter/pillarboxing."""
         if widget_size.height() == 0: return QRectF()
@@ -720,78 +1373,32 @@ class ClientWindow(QMainWindow):
         event.accept()
 
     def get_modern_stylesheet(self):
-        """Returns a QSS string for a modern dark theme."""
-        return """
-        QMainWindow {
-            background-color: #2c3e50;
-        }
-        QDockWidget {
-            titlebar-close-icon: url(none);
-            titlebar-normal-icon: url(none);
-        }
-        QDockWidget::title {
-            text-align: left;
-            background: #34495e;
-            padding: 5px;
-            padding-left: 10px;
-            color: white;
-            font-weight: bold;
-        }
-        QWidget#topBar {
-            background-color: #34495e;
-            border-bottom: 1px solid #2c3e50;
-        }
-        QLabel {
-            color: #ecf0f1;
-            padding: 5px;
-        }
-        QLineEdit {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            border: 1px solid #34495e;
-            border-radius: 4px;
-            padding: 5px;
-        }
-        QLineEdit:focus {
-            border: 1px solid #3498db;
-        }
-        QPushButton {
-            background-color: #3498db;
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            font-weight: bold;
-        }
-        QPushButton:hover {
-            background-color: #2980b9;
-        }
-        QPushButton:pressed {
-            background-color: #1f618d;
-        }
-        QPushButton:disabled {
-            background-color: #566573;
-            color: #95a5a6;
-        }
-        QPushButton#exitButton {
-            background-color: #e74c3c;
-        }
-        QPushButton#exitButton:hover {
-            background-color: #c0392b;
-        }
-        QTextEdit {
-            background-color: #1e2b37;
-            color: #ecf0f1;
-            border: 1px solid #34495e;
-            font-family: Consolas, 'Courier New', monospace;
-        }
-        QMessageBox QPushButton {
-            min-width: 80px;
-        }
+        """Returns the QSS string for the modern dark theme.
+
+        State-driven styling in this window rides Qt's pseudo-states
+        (:hover, :pressed, :disabled) and dynamic properties like
+        [danger="true"]. If a dynamic property ever changes after show,
+        refresh with style().polish(widget) alone — never unpolish()
+        first, which forces a full style teardown and rebuild per widget.
         """
+        return _MODERN_QSS
+
 
 if __name__ == "__main__":
+    # Coalesce high-rate input events before the application exists; every
+    # uncompressed move would otherwise walk the style engine separately.
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressHighFrequencyEvents, True)
     app = QApplication(sys.argv)
+    # Fusion is a predictable, cheap base for the QSS to resolve against,
+    # and combo animations just add style recomputes per popup.
+    app.setStyle(QStyleFactory.create("Fusion"))
+    QApplication.setEffectEnabled(Qt.UIEffect.UI_AnimateCombo, False)
+    # Application-level stylesheet: Qt resolves the rules once and shares
+    # them across all widgets instead of re-polishing a window subtree
+    # every time children are added. When the platform theme is already
+    # dark, keep the native style and only patch the few custom rules.
+    system_is_dark = app.palette().color(QPalette.ColorRole.Window).lightness() < 128
+    app.setStyleSheet(_DARK_OVERRIDE_QSS if system_is_dark else _MODERN_QSS)
     window = ClientWindow()
     window.show()
     sys.exit(app.exec())
@@ -8,19 +8,25 @@ import shutil
 import subprocess
 import sys
 import configparser
+import html
 import platform
 import json # Added for remote control events
-
-from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QLabel, QTextEdit, QFrame, QMessageBox,
-    QSlider, QCheckBox, QRadioButton, QGroupBox, QSystemTrayIcon, QMenu,
-    QButtonGroup
-)
+import re
+import selectors
+import concurrent.futures
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+from collections import deque, namedtuple
+
+# Only QtCore at module level: the server itself needs just signals/threading
+# support, and skipping the widget stack keeps headless imports (containers,
+# systemd units) fast and free of Qt platform-plugin requirements. The widget
+# imports live in the __main__ GUI block below.
 from PyQt6.QtCore import (
     QObject, QThread, pyqtSignal, Qt, QTimer, QCoreApplication, QSize
 )
-from PyQt6.QtGui import QIcon, QPixmap, QFont, QAction
 
 # --- Check for required libraries ---
 try:
@@ -36,6 +42,34 @@ try:
 except ImportError:
     MSS_SUPPORT = False
 
+# dxcam captures via the Windows Desktop Duplication API, roughly an order
+# of magnitude faster than mss there. Only meaningful on win32.
+try:
+    import dxcam
+    DXCAM_SUPPORT = True
+except ImportError:
+    DXCAM_SUPPORT = False
+
+# Frame digest for the dirty-frame gate: skip encode+send when the captured
+# buffer is identical to the previous one. xxhash digests at memory speed;
+# crc32 is the stdlib fallback and still far cheaper than a JPEG encode.
+try:
+    from xxhash import xxh3_64_intdigest as _frame_digest
+except ImportError:
+    from zlib import crc32 as _frame_digest
+
+# libjpeg-turbo's SIMD kernels encode JPEG 2-4x faster than Pillow's scalar
+# path and consume the BGRX capture buffer as-is, skipping the per-frame
+# colorspace reformat. Constructing TurboJPEG() can raise OSError when the
+# native library is missing even if the binding imports.
+try:
+    import numpy
+    from turbojpeg import TurboJPEG, TJPF_BGRX, TJSAMP_420
+    _turbojpeg = TurboJPEG()
+    TURBOJPEG_SUPPORT = True
+except (ImportError, OSError):
+    TURBOJPEG_SUPPORT = False
+
 # --- Remote Control Imports ---
 try:
     from pynput import mouse, keyboard
@@ -43,10 +77,16 @@ try:
 except ImportError:
     PYNPUT_SUPPORT = False
 
+# orjson parses the small control-event dicts several times faster than the
+# stdlib json module and accepts bytes directly (no utf-8 decode step).
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 # --- Configuration ---
 HOST = '0.0.0.0'  # Listen on all available network interfaces
 PORT = 9999
-AUDIO_PORT = PORT + 1
 CONTROL_PORT = 9998 # New port for remote control
 CONFIG_FILE = "server.ini" # Configuration file for server settings
 
@@ -56,9 +96,23 @@ FORMAT_STR = 's16le' # Signed 16-bit Little Endian (lowercase for parec)
 CHANNELS = 2 # Stereo
 RATE = 48000 # 48kHz is a common desktop audio standard
 
+# Immutable settings snapshot. The server swaps the whole tuple atomically
+# under one lock, so streaming loops read all settings with a single lock-free
+# attribute load per frame instead of one lock acquisition per setting.
+Settings = namedtuple('Settings', 'jpeg_quality screen_capture_rate is_muted encoder_mode ffmpeg_encoder')
+
 
-def get_local_ip():
-    """Helper function to find the local IP address."""
+_cached_local_ip = None
+
+def get_local_ip(force=False):
+    """Helper function to find the local IP address.
+
+    The UDP-socket trick costs three syscalls, so the result is cached after
+    the first call; pass force=True to re-detect after an interface change.
+    """
+    global _cached_local_ip
+    if _cached_local_ip is not None and not force:
+        return _cached_local_ip
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
         s.connect(('10.255.255.255', 1))
@@ -67,62 +121,406 @@ def get_local_ip():
         IP = '127.0.0.1' # Fallback to 127.0.0.1 as a standard localhost
     finally:
         s.close()
+    _cached_local_ip = IP
     return IP
 
+def _wait_future(future, timeout=None):
+    """Waits for a pool task to finish, swallowing timeouts and task errors
+    (tasks report their own failures through the status signal)."""
+    if future is None:
+        return
+    try:
+        future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        pass
+    except Exception:
+        pass
+
+def _safe_close(sock):
+    """Closes a socket without raising.
+
+    Skips the shutdown() call when the descriptor is already gone (fileno of
+    -1) so an already-closed socket costs no syscall and no raised OSError.
+    """
+    if sock is None:
+        return
+    try:
+        if sock.fileno() != -1:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+# Linux value; socket only exposes the constant on some platforms.
+TCP_NOTSENT_LOWAT = getattr(socket, 'TCP_NOTSENT_LOWAT', 25)
+
+def tune_stream_socket(conn, sndbuf=None, rcvbuf=None, notsent_lowat=None):
+    """Applies low-latency TCP options to an accepted connection.
+
+    Disables Nagle so small header writes are not delayed, and optionally
+    widens the kernel send/receive buffers for high-bitrate streams.
+    notsent_lowat caps how much unsent data may sit in the send queue, so a
+    stalling link back-pressures the producer instead of accumulating
+    seconds of stale frames in the kernel buffer.
+    """
+    try:
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+    if sndbuf:
+        try:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+        except OSError:
+            pass
+    if rcvbuf:
+        try:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+    if notsent_lowat:
+        try:
+            conn.setsockopt(socket.IPPROTO_TCP, TCP_NOTSENT_LOWAT, notsent_lowat)
+        except OSError:
+            pass # Linux/macOS only
+
+def stream_read_size(conn, default=64 * 1024):
+    """Returns a relay read size snapped to whole TCP segments and pages.
+
+    Reading a multiple of the connection's MSS avoids partial-segment
+    trailing writes, and rounding up to a page multiple keeps the buffer
+    friendly to the allocator and to splice. Falls back to the default when
+    TCP_MAXSEG isn't available (e.g. Windows).
+    """
+    try:
+        mss_val = conn.getsockopt(socket.IPPROTO_TCP, socket.TCP_MAXSEG)
+    except (OSError, AttributeError):
+        return default
+    if mss_val <= 0:
+        return default
+    return max(default, ((mss_val * 32 + 4095) // 4096) * 4096)
+
 def recv_all(sock, n):
-    """Helper function to reliably receive n bytes from a socket."""
-    data = bytearray()
-    while len(data) < n:
+    """Helper function to reliably receive n bytes from a socket.
+
+    Fills a single pre-allocated buffer with recv_into() instead of growing a
+    bytearray with recv(), so no intermediate bytes objects are created per
+    call. Returns a bytes-like buffer (struct.unpack_from works on it
+    directly) or None if the connection closed.
+    """
+    buf = bytearray(n)
+    view = memoryview(buf)
+    offset = 0
+    while offset < n:
         try:
-            packet = sock.recv(n - len(data))
-            if not packet:
+            received = sock.recv_into(view[offset:])
+            if not received:
                 # Connection closed or error
                 return None
-            data.extend(packet)
+            offset += received
         except OSError as e:
             # Handle socket errors during recv
             print(f"Socket receive error: {e}")
             return None
-    return bytes(data)
+    return buf
+
+# Legacy mode multiplexes video and audio over the one stream socket;
+# every frame is a 1-byte type tag plus the '>I' length prefix. Frames
+# arrive in interleave order, which also keeps A/V roughly in sync.
+TAG_VIDEO = b'V'
+TAG_AUDIO = b'A'
+
+def send_framed(sock, payload, tag=b''):
+    """Sends a '>I' length-prefixed payload as one gather-write.
+
+    An optional type tag is prepended to the header for the multiplexed
+    legacy stream. sendmsg() submits header and body in a single syscall
+    so they can never be split by Nagle or scheduling; platforms without
+    sendmsg fall back to a joined sendall(). Short writes are completed
+    with sendall().
+    """
+    header = tag + struct.pack('>I', len(payload))
+    hdr_len = len(header)
+    try:
+        sent = sock.sendmsg([header, payload])
+    except (AttributeError, OSError):
+        sock.sendall(header + bytes(payload))
+        return
+    if sent < hdr_len:
+        sock.sendall(header[sent:])
+        sent = hdr_len
+    if sent < hdr_len + len(payload):
+        # Finish the payload from where the gather write stopped without
+        # materializing a joined copy of the frame.
+        sock.sendall(memoryview(payload)[sent - hdr_len:])
+
+# Linux zero-copy send support (not exposed by the socket module).
+SO_ZEROCOPY = 60
+MSG_ZEROCOPY = 0x4000000
+
+class ZeroCopySender:
+    """Frames payloads like send_framed() but sends them with MSG_ZEROCOPY.
+
+    For large buffers (legacy JPEG frames) this skips the kernel's
+    copy_from_user on the send path. The zero-copy contract requires the
+    source buffer to stay alive until the kernel reports completion on the
+    error queue, so sent buffers are parked in a deque and released as
+    completion ranges are reaped. Any setup or send failure permanently
+    falls back to the plain send_framed() path.
+    """
+
+    # Below this size the page-pinning overhead outweighs the saved copy.
+    MIN_ZEROCOPY_SIZE = 16384
 
-def detect_video_encoder(gui_updater):
-    """Detects the best available hardware video encoder for FFmpeg."""
+    def __init__(self, sock, tag=b''):
+        self.sock = sock
+        self.tag = tag
+        self.enabled = False
+        self._inflight = deque() # (seq, buffer) awaiting completion
+        self._next_seq = 0
+        if sys.platform == "linux":
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_ZEROCOPY, 1)
+                self.enabled = True
+            except OSError:
+                pass
+
+    def send(self, payload):
+        if not self.enabled or len(payload) < self.MIN_ZEROCOPY_SIZE:
+            send_framed(self.sock, payload, tag=self.tag)
+            return
+        header = self.tag + struct.pack('>I', len(payload))
+        try:
+            sent = self.sock.sendmsg([header, payload], [], MSG_ZEROCOPY)
+        except OSError:
+            # ENOBUFS or a kernel that rejects the flag: stop trying.
+            self.enabled = False
+            send_framed(self.sock, payload, tag=self.tag)
+            return
+        total = len(header) + len(payload)
+        if sent < total:
+            joined = header + payload
+            self.sock.sendall(memoryview(joined)[sent:])
+        self._inflight.append((self._next_seq, payload))
+        self._next_seq += 1
+        if len(self._inflight) >= 8:
+            self._reap()
+
+    def _reap(self):
+        """Drains zero-copy completions and drops the buffers they cover."""
+        try:
+            while self._inflight:
+                _, ancdata, _, _ = self.sock.recvmsg(
+                    0, 512, socket.MSG_ERRQUEUE | socket.MSG_DONTWAIT)
+                if not ancdata:
+                    break
+                for _, _, cmsg_data in ancdata:
+                    # struct sock_extended_err: ee_info..ee_data is the
+                    # inclusive range of completed send sequence numbers.
+                    if len(cmsg_data) < 16:
+                        continue
+                    ee_data = struct.unpack_from('=I', cmsg_data, 12)[0]
+                    while self._inflight and self._inflight[0][0] <= ee_data:
+                        self._inflight.popleft()
+        except OSError:
+            pass # Nothing queued yet; buffers stay parked until next reap
+
+# --- Binary control protocol ---
+# The control channel uses fixed opcode frames packed with prebuilt Structs
+# instead of newline-delimited JSON: a mouse move is 9 bytes instead of
+# ~60 and costs an unpack instead of a JSON parse. Opcode 0x00 carries a
+# length-prefixed JSON event for anything without a fixed frame. The
+# client encoder mirrors these definitions.
+OP_JSON = 0x00
+OP_MOUSE_MOVE = 0x01
+OP_MOUSE_CLICK = 0x02
+OP_MOUSE_SCROLL = 0x03
+OP_KEY_CHAR = 0x04
+OP_KEY_NAME = 0x05
+OP_TYPE_TEXT = 0x10
+
+_MOVE_STRUCT = struct.Struct('>Bff')       # op, rel_x, rel_y
+_CLICK_STRUCT = struct.Struct('>BBB')      # op, button id, pressed
+_SCROLL_STRUCT = struct.Struct('>Bii')     # op, dx, dy
+_KEYCHAR_STRUCT = struct.Struct('>BBI')    # op, pressed, codepoint
+_KEYNAME_HDR = struct.Struct('>BBB')       # op, pressed, name length
+_JSON_HDR = struct.Struct('>BI')           # op, payload length
+_TYPE_HDR = struct.Struct('>BI')           # op, utf-8 text length
+
+_BUTTON_NAMES = {1: 'left', 2: 'middle', 3: 'right'}
+
+def decode_control_events(buf):
+    """Decodes complete control frames from the front of buf.
+
+    Returns (events, consumed) where events are dicts in the shape
+    process_control_event() expects and consumed is how many bytes of buf
+    they covered; a trailing partial frame is left for the next read.
+    Raises ValueError on an unknown opcode (protocol desync).
+    """
+    events = []
+    offset = 0
+    n = len(buf)
+    while offset < n:
+        op = buf[offset]
+        if op == OP_MOUSE_MOVE:
+            if n - offset < _MOVE_STRUCT.size: break
+            _, rel_x, rel_y = _MOVE_STRUCT.unpack_from(buf, offset)
+            offset += _MOVE_STRUCT.size
+            events.append({'type': 'mouse_move', 'data': {'rel_x': rel_x, 'rel_y': rel_y}})
+        elif op == OP_MOUSE_CLICK:
+            if n - offset < _CLICK_STRUCT.size: break
+            _, button_id, pressed = _CLICK_STRUCT.unpack_from(buf, offset)
+            offset += _CLICK_STRUCT.size
+            events.append({'type': 'mouse_click', 'data': {
+                'button': _BUTTON_NAMES.get(button_id, ''), 'pressed': bool(pressed)}})
+        elif op == OP_MOUSE_SCROLL:
+            if n - offset < _SCROLL_STRUCT.size: break
+            _, dx, dy = _SCROLL_STRUCT.unpack_from(buf, offset)
+            offset += _SCROLL_STRUCT.size
+            events.append({'type': 'mouse_scroll', 'data': {'dx': dx, 'dy': dy}})
+        elif op == OP_KEY_CHAR:
+            if n - offset < _KEYCHAR_STRUCT.size: break
+            _, pressed, codepoint = _KEYCHAR_STRUCT.unpack_from(buf, offset)
+            offset += _KEYCHAR_STRUCT.size
+            events.append({'type': 'keyboard_press' if pressed else 'keyboard_release',
+                           'data': {'char': chr(codepoint)}})
+        elif op == OP_KEY_NAME:
+            if n - offset < _KEYNAME_HDR.size: break
+            _, pressed, name_len = _KEYNAME_HDR.unpack_from(buf, offset)
+            if n - offset < _KEYNAME_HDR.size + name_len: break
+            name = bytes(buf[offset + _KEYNAME_HDR.size:offset + _KEYNAME_HDR.size + name_len]).decode('ascii')
+            offset += _KEYNAME_HDR.size + name_len
+            events.append({'type': 'keyboard_press' if pressed else 'keyboard_release',
+                           'data': {'name': name}})
+        elif op == OP_TYPE_TEXT:
+            if n - offset < _TYPE_HDR.size: break
+            _, text_len = _TYPE_HDR.unpack_from(buf, offset)
+            if n - offset < _TYPE_HDR.size + text_len: break
+            text = bytes(buf[offset + _TYPE_HDR.size:offset + _TYPE_HDR.size + text_len]).decode('utf-8')
+            offset += _TYPE_HDR.size + text_len
+            events.append({'type': 'type_text', 'data': {'text': text}})
+        elif op == OP_JSON:
+            if n - offset < _JSON_HDR.size: break
+            _, payload_len = _JSON_HDR.unpack_from(buf, offset)
+            if n - offset < _JSON_HDR.size + payload_len: break
+            payload = bytes(buf[offset + _JSON_HDR.size:offset + _JSON_HDR.size + payload_len])
+            offset += _JSON_HDR.size + payload_len
+            events.append(_json_loads(payload))
+        else:
+            raise ValueError(f"unknown control opcode 0x{op:02x}")
+    return events, offset
+
+ENCODER_PROBE_TTL = 7 * 24 * 3600 # Re-probe ffmpeg encoders at most once a week
+
+# Low-latency preset/tune arguments per encoder, consumed by the ffmpeg
+# command builder. The CPU fallback runs ultrafast+zerolatency, hardware
+# encoders get their vendor-specific low-latency knobs.
+ENCODER_TUNE_ARGS = {
+    'libx264': ['-preset', 'ultrafast', '-tune', 'zerolatency', '-crf', '28'],
+    'h264_nvenc': ['-preset', 'p1', '-tune', 'll', '-rc', 'cbr', '-zerolatency', '1', '-b:v', '8M'],
+    'hevc_nvenc': ['-preset', 'p1', '-tune', 'll', '-rc', 'cbr', '-zerolatency', '1', '-b:v', '8M'],
+    'h264_amf': ['-usage', 'ultralowlatency', '-quality', 'speed', '-b:v', '8M'],
+    'hevc_amf': ['-usage', 'ultralowlatency', '-quality', 'speed', '-b:v', '8M'],
+    'h264_qsv': ['-preset', 'veryfast', '-b:v', '8M'],
+    'hevc_qsv': ['-preset', 'veryfast', '-b:v', '8M'],
+    'h264_vaapi': ['-b:v', '8M'],
+    'hevc_vaapi': ['-b:v', '8M'],
+}
+
+def _probe_ffmpeg_encoders():
+    """Runs a single 'ffmpeg -hide_banner -encoders' and returns the set of
+    hardware encoder names the build supports."""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                capture_output=True, text=True)
+    except (subprocess.SubprocessError, FileNotFoundError, OSError):
+        return set()
+    return set(re.findall(r'\s([a-z0-9_]+_(?:nvenc|amf|qsv|vaapi))\s', result.stdout))
+
+def detect_video_encoder(gui_updater, config):
+    """Detects the best available hardware video encoder for FFmpeg.
+
+    The encoder set is probed with a single ffmpeg invocation and the chosen
+    encoder is cached in the config file, so subsequent launches skip the
+    subprocess spawns entirely until the cache goes stale. The cache lives in
+    the server's shared ConfigParser (passed in as 'config') so that later
+    settings saves, which rewrite the whole file from that parser, keep the
+    'Detected' section instead of erasing it.
+    """
     if not shutil.which('ffmpeg'):
-        gui_updater("[!] CRITICAL: ffmpeg is not installed! FFmpeg modes are unavailable.", error=True)
+        gui_updater("[!] CRITICAL: ffmpeg is not installed! FFmpeg modes are unavailable.", True)
         return None, "FFmpeg (Unavailable)"
 
-    # Platform-specific checks
-    if sys.platform == "win32":
-        try:
-            # Check for NVIDIA GPU on Windows
-            output = subprocess.check_output(['ffmpeg', '-encoders'], text=True, stderr=subprocess.STDOUT)
-            if 'hevc_nvenc' in output:
-                gui_updater("[*] NVIDIA GPU detected. Using 'hevc_nvenc'.")
-                return 'hevc_nvenc', "FFmpeg HEVC (NVIDIA)"
-        except (subprocess.CalledProcessError, FileNotFoundError): pass
+    section = 'Detected'
+    if config.has_section(section):
+        cached = config.get(section, 'encoder', fallback=None)
+        cached_label = config.get(section, 'encoder_label', fallback=None)
+        probed_at = config.getfloat(section, 'probed_at', fallback=0.0)
+        if cached and cached_label and (time.time() - probed_at) < ENCODER_PROBE_TTL:
+            gui_updater(f"[*] Using cached encoder '{cached}'.", False)
+            return cached, cached_label
 
-    elif sys.platform == "linux":
-        try:
-            subprocess.check_output(['which', 'nvidia-smi'])
+    available = _probe_ffmpeg_encoders()
+    encoder, label = 'libx264', "FFmpeg x264 (CPU)"
+
+    if sys.platform == "win32":
+        # h264_nvenc encodes markedly faster than hevc_nvenc, so prefer it.
+        if 'h264_nvenc' in available:
+            gui_updater("[*] NVIDIA GPU detected. Using 'h264_nvenc'.", False)
+            encoder, label = 'h264_nvenc', "FFmpeg H.264 (NVIDIA)"
+        elif 'hevc_nvenc' in available:
             gui_updater("[*] NVIDIA GPU detected. Using 'hevc_nvenc'.", False)
-            return 'hevc_nvenc', "FFmpeg HEVC (NVIDIA)"
-        except (subprocess.CalledProcessError, FileNotFoundError): pass
-        try:
-            lspci_output = subprocess.check_output(['lspci'], text=True)
-            if 'AMD' in lspci_output and ('VGA' in lspci_output or 'Display' in lspci_output):
+            encoder, label = 'hevc_nvenc', "FFmpeg HEVC (NVIDIA)"
+    elif sys.platform == "linux":
+        # Encoder availability in the ffmpeg build does not imply the matching
+        # GPU is present, so confirm the hardware before picking one.
+        if encoder == 'libx264' and shutil.which('nvidia-smi'):
+            if 'h264_nvenc' in available:
+                gui_updater("[*] NVIDIA GPU detected. Using 'h264_nvenc'.", False)
+                encoder, label = 'h264_nvenc', "FFmpeg H.264 (NVIDIA)"
+            elif 'hevc_nvenc' in available:
+                gui_updater("[*] NVIDIA GPU detected. Using 'hevc_nvenc'.", False)
+                encoder, label = 'hevc_nvenc', "FFmpeg HEVC (NVIDIA)"
+        if encoder == 'libx264' and ('hevc_amf' in available or 'hevc_qsv' in available):
+            # One lspci run answers both vendor checks.
+            try:
+                lspci_output = subprocess.check_output(['lspci'], text=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                lspci_output = ''
+            has_gpu = 'VGA' in lspci_output or 'Display' in lspci_output
+            if has_gpu and 'hevc_amf' in available and 'AMD' in lspci_output:
                 gui_updater("[*] AMD GPU detected. Using 'hevc_amf'.", False)
-                return 'hevc_amf', "FFmpeg HEVC (AMD)"
-        except (subprocess.CalledProcessError, FileNotFoundError): pass
-        try:
-            lspci_output = subprocess.check_output(['lspci'], text=True)
-            if 'Intel' in lspci_output and ('VGA' in lspci_output or 'Display' in lspci_output):
+                encoder, label = 'hevc_amf', "FFmpeg HEVC (AMD)"
+            elif has_gpu and 'hevc_qsv' in available and 'Intel' in lspci_output:
                 gui_updater("[*] Intel GPU detected. Using 'hevc_qsv'.", False)
-                return 'hevc_qsv', "FFmpeg HEVC (Intel)"
-        except (subprocess.CalledProcessError, FileNotFoundError): pass
+                encoder, label = 'hevc_qsv', "FFmpeg HEVC (Intel)"
+        if encoder == 'libx264' and 'h264_vaapi' in available and os.path.exists('/dev/dri/renderD128'):
+            # Generic VAAPI: works on Intel and AMD through Mesa even when
+            # the vendor-specific encoders are not built in.
+            gui_updater("[*] VAAPI render node found. Using 'h264_vaapi'.", False)
+            encoder, label = 'h264_vaapi', "FFmpeg H.264 (VAAPI)"
+
+    if encoder == 'libx264':
+        gui_updater("[*] No dedicated hardware encoder found. Using CPU encoder 'libx264'.", False)
+
+    if not config.has_section(section):
+        config.add_section(section)
+    config.set(section, 'encoder', encoder)
+    config.set(section, 'encoder_label', label)
+    config.set(section, 'probed_at', str(time.time()))
+    # The parser also carries the user's settings now, so write via tempfile
+    # and rename like _save_settings does.
+    tmp_file = CONFIG_FILE + '.tmp'
+    try:
+        with open(tmp_file, 'w') as f:
+            config.write(f)
+        os.replace(tmp_file, CONFIG_FILE)
+    except IOError:
+        pass
 
-    # Fallback for all platforms
-    gui_updater("[*] No dedicated hardware encoder found. Using CPU encoder 'libx264'.", False)
-    return 'libx264', "FFmpeg x264 (CPU)"
+    return encoder, label
 
 
 # In viewer_server.py, replace the whole RemoteDesktopServer class
@@ -144,15 +542,21 @@ class RemoteDesktopServer(QObject):
         self.port = PORT
         self.server_socket = None
         self.client_conn = None
-        self.audio_socket = None
-        self.audio_client_conn = None
         self.is_running = False
+        # Legacy video and audio interleave tagged frames on client_conn
+        # from two tasks; the lock keeps their gather-writes whole.
+        self._legacy_send_lock = threading.Lock()
         self.session_type = os.environ.get('XDG_SESSION_TYPE', 'x11').lower() # Default to x11
         self.wayland_screencap_tool = None # For Wayland legacy screenshot tool
         self.settings_lock = threading.Lock() # Protects settings access
         self.media_process = None # Holds the Popen object for FFmpeg/parec
-        self._media_thread = None # To hold the streaming thread object
+        self._media_future = None # Future for the active media streaming task
+        # One shared pool instead of fresh threads per session; OS threads are
+        # reused across client reconnects.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='pyv')
         self.stream_management_lock = threading.Lock()
+        self._restart_lock = threading.Lock() # Coalesces queued ffmpeg restarts
+        self._log_buffer = deque(maxlen=256) # Parked verbose messages, flushed on error
         self._stop_stream_event = threading.Event()
         self._stop_heartbeat_event = threading.Event() # New event for heartbeat thread
 
@@ -162,8 +566,15 @@ class RemoteDesktopServer(QObject):
         self._stop_control_event = threading.Event()
         self.mouse_controller = mouse.Controller() if PYNPUT_SUPPORT else None
         self.keyboard_controller = keyboard.Controller() if PYNPUT_SUPPORT else None
+        # Static lookup tables so the hot event path does a dict get instead
+        # of getattr reflection and exception handling per key/click.
+        self._key_map = {k.name: k for k in keyboard.Key} if PYNPUT_SUPPORT else {}
+        self._btn_map = {b.name: b for b in mouse.Button} if PYNPUT_SUPPORT else {}
         self.remote_client_video_width = 1920
         self.remote_client_video_height = 1080
+        self._last_client_dims = None
+        self._mouse_affine = None # (ax, bx, ay, by) mapping relative coords to screen pixels
+        self._cached_monitor_source = None # PulseAudio monitor source, probed once
 
         self.monitor_dims = None
         if MSS_SUPPORT:
@@ -185,7 +596,36 @@ class RemoteDesktopServer(QObject):
             self.update_status_signal.emit("[!] Using fallback resolution 1920x1080 for mouse scaling.", True)
             self.monitor_dims = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
 
+        # Inclusive clamp bounds for mouse moves, precomputed once so the
+        # per-event hot path avoids the dict lookups and arithmetic.
+        self._mouse_bounds = (
+            self.monitor_dims['left'],
+            self.monitor_dims['top'],
+            self.monitor_dims['left'] + self.monitor_dims['width'] - 1,
+            self.monitor_dims['top'] + self.monitor_dims['height'] - 1,
+        )
+
+        # Static ffmpeg argv fragments, platform branches resolved once.
+        # The grab template is split around the framerate value; stream
+        # restarts (mute/encoder changes) only substitute the runtime knobs.
+        if sys.platform == "win32":
+            self._ffmpeg_grab = (['-f', 'gdigrab', '-framerate'], ['-i', 'desktop'])
+            self._ffmpeg_audio_in = ['-f', 'dshow', '-i', 'audio=Stereo Mix']
+        elif sys.platform == "darwin":
+            self._ffmpeg_grab = (['-f', 'avfoundation', '-framerate'], ['-i', '1:0'])
+            self._ffmpeg_audio_in = ['-f', 'avfoundation', '-i', 'none:0']
+        else: # Linux: capture the monitor_dims region
+            display = os.environ.get('DISPLAY', ':0')
+            self._ffmpeg_grab = (
+                ['-f', 'x11grab', '-video_size',
+                 f"{self.monitor_dims['width']}x{self.monitor_dims['height']}", '-framerate'],
+                ['-i', f"{display}+{self.monitor_dims['left']},{self.monitor_dims['top']}"])
+            self._ffmpeg_audio_in = None # Resolved per stream from the cached pulse monitor
+
         self.config = configparser.ConfigParser()
+        self._config_parsed = False
+        self._save_timer = None
+        self._save_timer_lock = threading.Lock()
         self._load_settings()
 
     def _restart_media_streams(self):
@@ -196,10 +636,9 @@ class RemoteDesktopServer(QObject):
         with self.stream_management_lock:
             self.update_status_signal.emit(f"[*] Switching mode to {self.encoder_mode}...", False)
 
-            self._stop_stream_event.set() # Signal the old streaming thread to stop its loop
+            self._stop_stream_event.set() # Signal the old streaming task to stop its loop
 
-            if self._media_thread and self._media_thread.is_alive():
-                self._media_thread.join(timeout=3) # Wait for it to finish
+            _wait_future(self._media_future, timeout=3) # Wait for it to finish
 
             if self.media_process and self.media_process.poll() is None:
                 self.media_process.terminate()
@@ -208,71 +647,103 @@ class RemoteDesktopServer(QObject):
                 except subprocess.TimeoutExpired:
                     self.media_process.kill()
 
-            self._media_thread = None # Reset reference
+            self._media_future = None # Reset reference
             self.media_process = None # Reset reference
             self._stop_stream_event.clear() # Clear for new stream
 
             if self.client_conn: # Only restart if a client is still connected
-                # Now, re-create and start the new media thread
+                # Now, submit the new media task to the pool
                 if self.encoder_mode.startswith("FFmpeg"):
-                    self._media_thread = threading.Thread(target=self.stream_ffmpeg, daemon=True)
+                    self._media_future = self._executor.submit(self.stream_ffmpeg)
                 else: # Legacy Mode
-                    self._media_thread = threading.Thread(target=self.stream_screen, daemon=True)
-                self._media_thread.start()
+                    self._media_future = self._executor.submit(self.stream_screen)
                 self.update_status_signal.emit(f"[*] Stream restarted in {self.encoder_mode} mode.", False)
             else:
                 self.update_status_signal.emit("[*] No client connected, not restarting media stream.", False)
 
 
-    # Properties for thread-safe access to settings
+    def snapshot_settings(self):
+        """Returns the current immutable settings tuple in one atomic read."""
+        return self._settings
+
+    def _replace_settings(self, **changes):
+        """Swaps in a new settings tuple with the given fields changed."""
+        with self.settings_lock:
+            self._settings = self._settings._replace(**changes)
+        self._schedule_save()
+
+    def _schedule_save(self):
+        """Debounces settings writes.
+
+        A dragging slider can change settings dozens of times per second;
+        instead of hitting the disk per tick, the file is flushed once,
+        500 ms after the last change.
+        """
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(0.5, self._save_settings)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    # Properties kept for GUI convenience; streaming loops should prefer
+    # snapshot_settings() to read several settings in one go.
     @property
     def jpeg_quality(self):
-        with self.settings_lock: return self._jpeg_quality
+        return self._settings.jpeg_quality
     @jpeg_quality.setter
     def jpeg_quality(self, value):
-        with self.settings_lock: self._jpeg_quality = value
+        self._replace_settings(jpeg_quality=value)
 
     @property
     def screen_capture_rate(self):
-        with self.settings_lock: return self._screen_capture_rate
+        return self._settings.screen_capture_rate
     @screen_capture_rate.setter
     def screen_capture_rate(self, value):
-        with self.settings_lock: self._screen_capture_rate = value
+        self._replace_settings(screen_capture_rate=value)
 
     @property
     def is_muted(self):
-        with self.settings_lock: return self._is_muted
+        return self._settings.is_muted
     @is_muted.setter
     def is_muted(self, value):
-        with self.settings_lock: self._is_muted = value
+        self._replace_settings(is_muted=value)
 
     @property
     def encoder_mode(self):
-        with self.settings_lock: return self._encoder_mode
+        return self._settings.encoder_mode
     @encoder_mode.setter
     def encoder_mode(self, value):
-        with self.settings_lock: self._encoder_mode = value
+        self._replace_settings(encoder_mode=value)
 
     @property
     def ffmpeg_encoder(self):
-        with self.settings_lock: return self._ffmpeg_encoder
+        return self._settings.ffmpeg_encoder
     @ffmpeg_encoder.setter
     def ffmpeg_encoder(self, value):
-        with self.settings_lock: self._ffmpeg_encoder = value
+        self._replace_settings(ffmpeg_encoder=value)
 
     def _load_settings(self):
-        """Loads settings from the configuration file."""
-        self.config.read(CONFIG_FILE)
+        """Loads settings from the configuration file.
+
+        The ini file is parsed only once; later calls rebuild the snapshot
+        from the in-memory config without re-reading the disk.
+        """
+        if not self._config_parsed:
+            self.config.read(CONFIG_FILE)
+            self._config_parsed = True
         section = 'ServerSettings'
         if not self.config.has_section(section):
             self.config.add_section(section)
 
         with self.settings_lock:
-            self._jpeg_quality = self.config.getint(section, 'jpeg_quality', fallback=75)
-            self._screen_capture_rate = self.config.getint(section, 'screen_capture_rate', fallback=30)
-            self._is_muted = self.config.getboolean(section, 'is_muted', fallback=False)
-            self._encoder_mode = self.config.get(section, 'encoder_mode', fallback="Legacy (Slow)")
-            self._ffmpeg_encoder = self.config.get(section, 'ffmpeg_encoder', fallback="libx264")
+            self._settings = Settings(
+                jpeg_quality=self.config.getint(section, 'jpeg_quality', fallback=75),
+                screen_capture_rate=self.config.getint(section, 'screen_capture_rate', fallback=30),
+                is_muted=self.config.getboolean(section, 'is_muted', fallback=False),
+                encoder_mode=self.config.get(section, 'encoder_mode', fallback="Legacy (Slow)"),
+                ffmpeg_encoder=self.config.get(section, 'ffmpeg_encoder', fallback="libx264"),
+            )
 
     def _save_settings(self):
         """Saves current settings to the configuration file."""
@@ -280,36 +751,30 @@ class RemoteDesktopServer(QObject):
         if not self.config.has_section(section):
             self.config.add_section(section)
 
-        with self.settings_lock:
-            self.config.set(section, 'jpeg_quality', str(self._jpeg_quality))
-            self.config.set(section, 'screen_capture_rate', str(self._screen_capture_rate))
-            self.config.set(section, 'is_muted', str(self._is_muted))
-            self.config.set(section, 'encoder_mode', str(self._encoder_mode))
-            self.config.set(section, 'ffmpeg_encoder', str(self._ffmpeg_encoder))
+        s = self.snapshot_settings()
+        self.config.set(section, 'jpeg_quality', str(s.jpeg_quality))
+        self.config.set(section, 'screen_capture_rate', str(s.screen_capture_rate))
+        self.config.set(section, 'is_muted', str(s.is_muted))
+        self.config.set(section, 'encoder_mode', str(s.encoder_mode))
+        self.config.set(section, 'ffmpeg_encoder', str(s.ffmpeg_encoder))
 
+        # Write to a tempfile and rename so a crash mid-write never leaves a
+        # truncated config behind.
+        tmp_file = CONFIG_FILE + '.tmp'
         try:
-            with open(CONFIG_FILE, 'w') as f:
+            with open(tmp_file, 'w') as f:
                 self.config.write(f)
+            os.replace(tmp_file, CONFIG_FILE)
             self.update_status_signal.emit(f"[*] Settings saved to {CONFIG_FILE}", False)
         except IOError as e:
             self.update_status_signal.emit(f"[!] Error saving settings to {CONFIG_FILE}: {e}", True)
 
-    def _connection_heartbeat(self):
-        """
-        A simple thread to keep the client_conn open and block the main loop.
-        It waits until signalled to stop, or if client_conn is lost (e.g. from stream_ffmpeg).
-        """
-        self.update_status_signal.emit("[*] Video connection heartbeat thread started.", False)
-        while not self._stop_heartbeat_event.is_set():
-            time.sleep(0.5) # Periodically sleep to prevent busy-waiting
-        self.update_status_signal.emit("[*] Video connection heartbeat thread stopped.", False)
-
     def run_server(self):
         """Starts the main server listening loop. This method runs in a QThread."""
         self.update_status_signal.emit(f"[*] Starting server on {self.host}:{self.port}...", False)
 
-        # Initialize current_audio_thread at the top-level scope of this method
-        current_audio_thread = None
+        # Initialize current_audio_future at the top-level scope of this method
+        current_audio_future = None
 
         # Pre-flight Checks
         if not PILLOW_SUPPORT:
@@ -346,7 +811,7 @@ class RemoteDesktopServer(QObject):
 
         try:
             self.is_running = True
-            # --- Video/Audio Sockets ---
+            # --- Stream Socket ---
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.settimeout(1.0) # Non-blocking accept with timeout
@@ -354,14 +819,6 @@ class RemoteDesktopServer(QObject):
             self.server_socket.listen(1)
             self.update_status_signal.emit(f"[*] Video stream listener on {self.host}:{self.port}", False)
 
-            if self.encoder_mode.startswith("Legacy"):
-                self.audio_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.audio_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.audio_socket.settimeout(1.0)
-                self.audio_socket.bind((self.host, AUDIO_PORT))
-                self.audio_socket.listen(1)
-                self.update_status_signal.emit(f"[*] Audio stream listener on {self.host}:{AUDIO_PORT}", False)
-
             # --- Control Socket ---
             if PYNPUT_SUPPORT:
                 self.control_socket_listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -370,111 +827,56 @@ class RemoteDesktopServer(QObject):
                 self.control_socket_listener.bind((self.host, CONTROL_PORT))
                 self.control_socket_listener.listen(1)
                 self.update_status_signal.emit(f"[*] Remote control listener on {self.host}:{CONTROL_PORT}", False)
-                # Start a thread to handle incoming control connections
-                threading.Thread(target=self._control_listener_loop, daemon=True).start()
 
             self.update_status_signal.emit("[*] Waiting for a client connection...", False)
 
-            while self.is_running:
-                # This outer try-except handles general server errors and loops for new connections
-                try:
-                    self.client_conn, addr = self.server_socket.accept()
-                    mode_byte = 'F' if self.encoder_mode.startswith("FFmpeg") else 'L'
-                    self.client_conn.sendall(mode_byte.encode())
-                    self.update_status_signal.emit(f"[*] Connected from {addr}. Server is in '{self.encoder_mode}' mode.", False)
-                    self.client_connected_signal.emit()
-
-                    # Initialize heartbeat event for this session
-                    self._stop_heartbeat_event.clear()
-
-                    # Handle Legacy audio connection and thread start if applicable
-                    if mode_byte == 'L' and self.audio_socket:
-                        try:
-                            self.audio_client_conn, _ = self.audio_socket.accept()
-                            self.update_status_signal.emit(f"[*] Legacy audio client connected from {addr}.", False)
-                            # Start audio thread only if connection successful and it's Legacy mode
-                            if sys.platform == "linux": # Check platform for parec/pactl dependency
-                                current_audio_thread = threading.Thread(target=self.stream_audio, daemon=True)
-                                current_audio_thread.start()
-                            else:
-                                self.update_status_signal.emit("[!] Audio streaming not supported on this OS for Legacy mode.", True)
-                                self.audio_client_conn = None # Ensure client doesn't expect audio
-                        except socket.timeout:
-                            self.update_status_signal.emit("[*] Client connected for video but not audio within timeout.", False)
-                            self.audio_client_conn = None
-                        except Exception as e:
-                            self.update_status_signal.emit(f"[*] Unexpected error during audio connection: {e}", True)
-                            self.audio_client_conn = None
-
-                    # --- Start client video session management ---
-                    self._stop_stream_event.clear() # Clear for new stream instance
-                    self._media_thread = None # Ensure no old thread reference before starting new one
-
-                    if self.encoder_mode.startswith("FFmpeg"):
-                        self._media_thread = threading.Thread(target=self.stream_ffmpeg, daemon=True)
-                    else: # Legacy Mode
-                        self._media_thread = threading.Thread(target=self.stream_screen, daemon=True)
-
-                    if self._media_thread:
-                        self._media_thread.start()
-
-                    # Start the heartbeat thread to keep the session alive
-                    heartbeat_thread = threading.Thread(target=self._connection_heartbeat, daemon=True)
-                    heartbeat_thread.start()
-
-                    # Wait for the heartbeat thread to indicate the session is over
-                    heartbeat_thread.join()
-
-                    self.update_status_signal.emit("[*] Client disconnected. Server ready for a new connection.", False)
-                    self.client_disconnected_signal.emit()
-
-                except socket.timeout:
-                    continue # No client connected within timeout, continue waiting
-                except Exception as e: # This handles errors before the main accept loop starts or if the loop breaks critically
-                    if self.is_running:
-                        self.update_status_signal.emit(f"[!] A critical error occurred in main loop: {e}", True)
-                    break # Break out of while loop if a critical error occurs
-                finally:
-                    # Cleanup specific to this client session
-                    self._stop_stream_event.set() # Ensure streaming threads stop
-                    self._stop_heartbeat_event.set() # Ensure heartbeat thread stops
-                    self._stop_control_event.set() # Ensure control thread stops for this session
-
-                    if self._media_thread and self._media_thread.is_alive():
-                        self._media_thread.join(timeout=2)
-                        self._media_thread = None
-
-                    if current_audio_thread and current_audio_thread.is_alive():
-                        current_audio_thread.join(timeout=2)
+            # One selector watches both listening sockets from this thread;
+            # no separate control-accept thread and no per-listener timeout
+            # polling. Session end is signalled through the heartbeat event
+            # and picked up here, so control clients can connect while a
+            # video session is active.
+            sel = selectors.DefaultSelector()
+            self.server_socket.setblocking(False)
+            sel.register(self.server_socket, selectors.EVENT_READ, 'video')
+            if self.control_socket_listener is not None:
+                self.control_socket_listener.setblocking(False)
+                sel.register(self.control_socket_listener, selectors.EVENT_READ, 'control')
 
-                    if self.media_process:
-                        self.media_process.terminate()
-                        try:
-                            self.media_process.wait(timeout=2)
-                        except subprocess.TimeoutExpired:
-                            self.media_process.kill()
-                        self.media_process = None
-
-                    if self.client_conn:
-                        try: self.client_conn.shutdown(socket.SHUT_RDWR)
-                        except OSError: pass
-                        try: self.client_conn.close()
-                        except OSError: pass
-                    self.client_conn = None
-
-                    if self.audio_client_conn:
-                        try: self.audio_client_conn.shutdown(socket.SHUT_RDWR)
-                        except OSError: pass
-                        try: self.audio_client_conn.close()
-                        except OSError: pass
-                    self.audio_client_conn = None
-
-                    if self.control_client_conn: # Close control client for this session
-                        try: self.control_client_conn.shutdown(socket.SHUT_RDWR)
-                        except OSError: pass
-                        try: self.control_client_conn.close()
-                        except OSError: pass
-                    self.control_client_conn = None
+            try:
+                while self.is_running:
+                    try:
+                        events = sel.select(timeout=1.0)
+                        for key, _ in events:
+                            if key.data == 'video':
+                                try:
+                                    conn, addr = self.server_socket.accept()
+                                except (BlockingIOError, OSError):
+                                    continue
+                                # BSD-derived kernels (macOS) make accepted
+                                # sockets inherit the listener's non-blocking
+                                # flag; the stream path needs blocking I/O.
+                                conn.setblocking(True)
+                                if self.client_conn is not None:
+                                    _safe_close(conn) # Only one client at a time
+                                    continue
+                                current_audio_future = self._start_client_session(conn, addr)
+                            elif key.data == 'control':
+                                self._accept_control_client()
+
+                        # A streaming task flags the end of the session by
+                        # setting the heartbeat stop event.
+                        if self.client_conn is not None and self._stop_heartbeat_event.is_set():
+                            self._end_client_session(current_audio_future)
+                            current_audio_future = None
+                            self.update_status_signal.emit("[*] Client disconnected. Server ready for a new connection.", False)
+                            self.client_disconnected_signal.emit()
+                    except Exception as e:
+                        if self.is_running:
+                            self.update_status_signal.emit(f"[!] A critical error occurred in main loop: {e}", True)
+                        break
+            finally:
+                sel.close()
+                self._end_client_session(current_audio_future)
 
         except Exception as e:
             self.update_status_signal.emit(f"[!] An error occurred during server startup: {e}", True)
@@ -482,48 +884,133 @@ class RemoteDesktopServer(QObject):
         finally:
             self.stop_server()
 
-    def _control_listener_loop(self):
-        """Listens for incoming remote control client connections."""
-        self.update_status_signal.emit(f"[*] Control listener thread started on {self.host}:{CONTROL_PORT}.", False)
-        while self.is_running:
+    def _start_client_session(self, conn, addr):
+        """Sets up a freshly accepted video client and starts its media tasks.
+
+        Sends the mode byte, accepts the legacy audio connection when
+        applicable and submits the streaming work to the pool. Returns the
+        audio future (or None) for later cleanup.
+        """
+        audio_future = None
+        self.client_conn = conn
+        # Latency beats throughput for screen sharing: a 1 MiB send buffer
+        # with a 16 KiB not-sent watermark makes sends block early instead
+        # of queueing stale video in the kernel during network hiccups.
+        tune_stream_socket(conn, sndbuf=1 << 20, notsent_lowat=16384)
+        mode_byte = 'F' if self.encoder_mode.startswith("FFmpeg") else 'L'
+        conn.sendall(mode_byte.encode())
+        self.update_status_signal.emit(f"[*] Connected from {addr}. Server is in '{self.encoder_mode}' mode.", False)
+        self.client_connected_signal.emit()
+
+        # Initialize heartbeat event for this session
+        self._stop_heartbeat_event.clear()
+
+        # Legacy audio rides the same socket as video as tagged frames, so
+        # there is no second connection to accept — just start the task.
+        if mode_byte == 'L':
+            if sys.platform == "linux": # Check platform for parec/pactl dependency
+                audio_future = self._executor.submit(self.stream_audio)
+            else:
+                self.update_status_signal.emit("[!] Audio streaming not supported on this OS for Legacy mode.", True)
+
+        # --- Start client video session management ---
+        self._stop_stream_event.clear() # Clear for new stream instance
+
+        if self.encoder_mode.startswith("FFmpeg"):
+            self._media_future = self._executor.submit(self.stream_ffmpeg)
+        else: # Legacy Mode
+            self._media_future = self._executor.submit(self.stream_screen)
+
+        return audio_future
+
+    def _end_client_session(self, audio_future):
+        """Tears down the per-session tasks, process and connections."""
+        self._stop_stream_event.set() # Ensure streaming tasks stop
+        self._stop_heartbeat_event.set()
+        self._stop_control_event.set() # Ensure control task stops for this session
+
+        _wait_future(self._media_future, timeout=2)
+        self._media_future = None
+
+        _wait_future(audio_future, timeout=2)
+
+        if self.media_process:
+            self.media_process.terminate()
             try:
-                if self.control_client_conn is None:
-                    conn, addr = self.control_socket_listener.accept()
-                    self.update_status_signal.emit(f"[*] Control client connected from {addr}.", False)
-                    self.control_client_conn = conn
-                    self._stop_control_event.clear()
-                    threading.Thread(target=self._handle_control_client, args=(conn, addr), daemon=True).start()
-                else:
-                    time.sleep(1)
-            except socket.timeout:
-                continue
-            except Exception as e:
-                if self.is_running:
-                    self.update_status_signal.emit(f"[!] Error in control listener loop: {e}", True)
-                break
+                self.media_process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.media_process.kill()
+            self.media_process = None
 
-        self.update_status_signal.emit("[*] Control listener thread stopped.", False)
+        _safe_close(self.client_conn)
+        self.client_conn = None
+
+        _safe_close(self.control_client_conn) # Close control client for this session
+        self.control_client_conn = None
+
+    def _accept_control_client(self):
+        """Accepts a remote control connection from the selector loop."""
+        try:
+            conn, addr = self.control_socket_listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        # See the video accept: macOS inherits O_NONBLOCK from the listener.
+        conn.setblocking(True)
+        if self.control_client_conn is not None:
+            _safe_close(conn) # Only one control client at a time
+            return
+        tune_stream_socket(conn, rcvbuf=262144)
+        self.update_status_signal.emit(f"[*] Control client connected from {addr}.", False)
+        self.control_client_conn = conn
+        self._stop_control_event.clear()
+        self._executor.submit(self._handle_control_client, conn, addr)
 
 
     def _handle_control_client(self, conn, addr):
         """Handles incoming remote control events from a connected client."""
-        buffer = ""
+        # One receive buffer per client, reused across recv_into() calls so the
+        # hot event path never allocates a fresh bytes object or decodes
+        # incomplete data.
+        rbuf = bytearray(16384)
+        pending = bytearray()
         try:
             while self.is_running and not self._stop_control_event.is_set():
-                data = conn.recv(4096).decode('utf-8')
-                if not data:
+                received = conn.recv_into(rbuf)
+                if not received:
                     self.update_status_signal.emit("[*] Control client disconnected.", False)
                     break
-                buffer += data
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
+                pending += rbuf[:received]
+                try:
+                    events, consumed = decode_control_events(pending)
+                except ValueError as e:
+                    # Unknown opcode means the stream is desynced; there is
+                    # no way to find the next frame boundary, so drop the
+                    # connection rather than replay garbage input.
+                    self.update_status_signal.emit(f"[!] Control protocol error: {e}. Closing control connection.", True)
+                    break
+                del pending[:consumed]
+                # Coalesce mouse moves within the batch: only the newest
+                # queued position matters for cursor placement, so superseded
+                # moves are dropped instead of each being pushed to pynput.
+                # A pending move is flushed before any other event type so
+                # clicks and scrolls still land at the right coordinates.
+                pending_move = None
+                for event_data in events:
                     try:
-                        event_data = json.loads(line)
+                        if event_data['type'] == 'mouse_move':
+                            pending_move = event_data
+                            continue
+                        if pending_move is not None:
+                            self.process_control_event(pending_move)
+                            pending_move = None
                         self.process_control_event(event_data)
-                    except json.JSONDecodeError as e:
-                        self.update_status_signal.emit(f"[*] Control JSON decode error: {e}, Data: {line[:50]}...", True)
                     except Exception as e:
-                        self.update_status_signal.emit(f"[*] Error processing control event: {e}", True)
+                        self._emit_status(f"[*] Error processing control event: {e}", verbose=True)
+                if pending_move is not None:
+                    try:
+                        self.process_control_event(pending_move)
+                    except Exception as e:
+                        self._emit_status(f"[*] Error processing control event: {e}", verbose=True)
         except (socket.error, ConnectionResetError, BrokenPipeError) as e:
             self.update_status_signal.emit(f"[*] Control client {addr} connection lost: {e}", False)
         except Exception as e:
@@ -536,6 +1023,54 @@ class RemoteDesktopServer(QObject):
             conn.close()
 
 
+    def _mouse_affine_for(self, client_width, client_height):
+        """Returns affine coefficients (ax, bx, ay, by) mapping client-relative
+        mouse coordinates to server screen pixels.
+
+        Server dimensions are fixed and client dimensions change rarely, so
+        the aspect-ratio correction is folded into the coefficients once per
+        geometry instead of being rederived on every mouse-move event.
+        """
+        dims = (client_width, client_height)
+        if self._mouse_affine is None or self._last_client_dims != dims:
+            server_width = self.monitor_dims['width']
+            server_height = self.monitor_dims['height']
+            left = self.monitor_dims['left']
+            top = self.monitor_dims['top']
+            ax, bx = float(server_width), float(left)
+            ay, by = float(server_height), float(top)
+            if client_width and client_height:
+                server_aspect = server_width / server_height
+                client_aspect = client_width / client_height
+                if client_aspect > server_aspect:
+                    # Letterboxed client: corrected_rel_y = (rel_y - offset) / scale
+                    scale = server_aspect / client_aspect
+                    offset = (1.0 - scale) / 2.0
+                    ay = server_height / scale
+                    by = top - offset * ay
+                elif client_aspect < server_aspect:
+                    # Pillarboxed client: corrected_rel_x = (rel_x - offset) / scale
+                    scale = client_aspect / server_aspect
+                    offset = (1.0 - scale) / 2.0
+                    ax = server_width / scale
+                    bx = left - offset * ax
+            self._last_client_dims = dims
+            self._mouse_affine = (ax, bx, ay, by)
+        return self._mouse_affine
+
+    def _lookup_key(self, data):
+        """Resolves a key event payload to a pynput key via the static map."""
+        name = data.get('name')
+        if name is not None:
+            return self._key_map.get(name.rpartition('.')[2])
+        char = data.get('char')
+        if char:
+            try:
+                return keyboard.KeyCode(char=char)
+            except ValueError:
+                return None
+        return None
+
     def process_control_event(self, event_data):
         """Processes and simulates a received remote control event."""
         if not PYNPUT_SUPPORT or self.mouse_controller is None or self.keyboard_controller is None:
@@ -543,47 +1078,22 @@ class RemoteDesktopServer(QObject):
 
         event_type = event_data['type']
         data = event_data['data']
-        server_width = self.monitor_dims['width']
-        server_height = self.monitor_dims['height']
 
         try:
             if event_type == 'mouse_move':
-                client_rel_x = data['rel_x']
-                client_rel_y = data['rel_y']
-                client_width = data.get('client_video_width')
-                client_height = data.get('client_video_height')
-
-                if not client_width or not client_height:
-                    target_x = int(client_rel_x * server_width) + self.monitor_dims['left']
-                    target_y = int(client_rel_y * server_height) + self.monitor_dims['top']
-                else:
-                    server_aspect = server_width / server_height
-                    client_aspect = client_width / client_height
-                    corrected_rel_x = client_rel_x
-                    corrected_rel_y = client_rel_y
-
-                    if client_aspect > server_aspect:
-                        scale = server_aspect / client_aspect
-                        offset = (1.0 - scale) / 2.0
-                        if client_rel_y < offset or client_rel_y > (1.0 - offset): return
-                        corrected_rel_y = (client_rel_y - offset) / scale
-                    elif client_aspect < server_aspect:
-                        scale = client_aspect / server_aspect
-                        offset = (1.0 - scale) / 2.0
-                        if client_rel_x < offset or client_rel_x > (1.0 - offset): return
-                        corrected_rel_x = (client_rel_x - offset) / scale
-
-                    target_x = int(corrected_rel_x * server_width) + self.monitor_dims['left']
-                    target_y = int(corrected_rel_y * server_height) + self.monitor_dims['top']
-
-                bounds_right = self.monitor_dims['left'] + server_width
-                bounds_bottom = self.monitor_dims['top'] + server_height
-                target_x = max(self.monitor_dims['left'], min(target_x, bounds_right - 1))
-                target_y = max(self.monitor_dims['top'], min(target_y, bounds_bottom - 1))
+                ax, bx, ay, by = self._mouse_affine_for(
+                    data.get('client_video_width'), data.get('client_video_height'))
+                target_x = int(data['rel_x'] * ax + bx)
+                target_y = int(data['rel_y'] * ay + by)
+
+                lo_x, lo_y, hi_x, hi_y = self._mouse_bounds
+                target_x = lo_x if target_x < lo_x else hi_x if target_x > hi_x else target_x
+                target_y = lo_y if target_y < lo_y else hi_y if target_y > hi_y else target_y
                 self.mouse_controller.position = (target_x, target_y)
 
             elif event_type == 'mouse_click':
-                button = mouse.Button[data['button'].split('.')[-1]]
+                button = self._btn_map.get(data['button'].rpartition('.')[2])
+                if button is None: return
                 if data['pressed']: self.mouse_controller.press(button)
                 else: self.mouse_controller.release(button)
 
@@ -591,21 +1101,40 @@ class RemoteDesktopServer(QObject):
                 self.mouse_controller.scroll(data['dx'], data['dy'])
 
             elif event_type == 'keyboard_press':
-                try:
-                    key = getattr(keyboard.Key, data['name'].split('.')[-1]) if 'name' in data else keyboard.KeyCode(char=data['char'])
-                    self.keyboard_controller.press(key)
-                except (AttributeError, ValueError): pass
+                key = self._lookup_key(data)
+                if key is not None: self.keyboard_controller.press(key)
 
             elif event_type == 'keyboard_release':
-                try:
-                    key = getattr(keyboard.Key, data['name'].split('.')[-1]) if 'name' in data else keyboard.KeyCode(char=data['char'])
-                    self.keyboard_controller.release(key)
-                except (AttributeError, ValueError): pass
+                key = self._lookup_key(data)
+                if key is not None: self.keyboard_controller.release(key)
+
+            elif event_type == 'type_text':
+                # One blob from the client's clipboard; pynput handles the
+                # per-character key events internally.
+                self.keyboard_controller.type(data['text'])
 
         except Exception as e:
             self.update_status_signal.emit(f"Error simulating control event {event_type}: {e}", True)
 
 
+    def request_ffmpeg_restart(self):
+        """Queues a stream restart on the server's worker pool.
+
+        The GUI used to spawn a fresh thread per mute toggle; routing the
+        restart through the shared executor avoids thread churn, and rapid
+        toggles coalesce — while one restart is pending another request is
+        a no-op, since the restart reads the latest settings snapshot
+        anyway.
+        """
+        if not self._restart_lock.acquire(blocking=False):
+            return
+        def _run():
+            try:
+                self.restart_ffmpeg_stream()
+            finally:
+                self._restart_lock.release()
+        self._executor.submit(_run)
+
     def restart_ffmpeg_stream(self):
         """Safely restarts the FFmpeg stream to apply new settings (e.g., mute, quality)."""
         with self.stream_management_lock:
@@ -615,8 +1144,7 @@ class RemoteDesktopServer(QObject):
             self.update_status_signal.emit(f"[*] Applying new FFmpeg settings (framerate: {self.screen_capture_rate} FPS, mute: {self.is_muted})...", False)
 
             self._stop_stream_event.set()
-            if self._media_thread and self._media_thread.is_alive():
-                self._media_thread.join(timeout=2)
+            _wait_future(self._media_future, timeout=2)
 
             if self.media_process:
                 self.media_process.terminate()
@@ -626,71 +1154,112 @@ class RemoteDesktopServer(QObject):
                     self.media_process.kill()
                 self.media_process = None
 
-            self._media_thread = None
             self._stop_stream_event.clear()
 
-            self._media_thread = threading.Thread(target=self.stream_ffmpeg, daemon=True)
-            self._media_thread.start()
+            self._media_future = self._executor.submit(self.stream_ffmpeg)
             self.update_status_signal.emit("[*] FFmpeg stream restarted with new settings.", False)
 
 
+    def _emit_status(self, message, is_error=False, verbose=False):
+        """Status emit with a cheap level gate for hot-path chatter.
+
+        Verbose messages (per-event decode noise and the like) are parked in
+        a bounded ring buffer instead of crossing into the GUI thread; they
+        are flushed as context the next time an error is reported. This
+        keeps a flood of malformed control frames or encoder warnings from
+        stalling the streaming threads on the Qt event queue.
+        """
+        if verbose and not is_error:
+            self._log_buffer.append(message)
+            return
+        if is_error and self._log_buffer:
+            # Escaped and <br>-joined for the rich-text log, as in _log_stderr.
+            self.update_status_signal.emit("<br>".join(map(html.escape, self._log_buffer)), False)
+            self._log_buffer.clear()
+        self.update_status_signal.emit(message, is_error)
+
     def _log_stderr(self, pipe):
-        """Reads from a pipe and logs to the GUI status."""
+        """Reads from a pipe and logs to the GUI status.
+
+        Lines are coalesced into one emit per 32 lines or 200 ms, whichever
+        comes first: each emit crosses threads through a queued connection
+        and re-lays-out the status QTextEdit, which serializes the GUI
+        thread when ffmpeg gets chatty. The GUI slot inserts messages as
+        rich text (which collapses '\n' to a space), so lines are escaped
+        and joined with <br> to keep the batch rendering line-per-line.
+        """
+        batch = []
+        last_flush = time.monotonic()
         try:
             for line in iter(pipe.readline, b''):
-                self.update_status_signal.emit(f"[FFmpeg]: {line.decode('utf-8', errors='ignore').strip()}", True)
+                batch.append(html.escape(f"[FFmpeg]: {line.decode('utf-8', errors='ignore').strip()}"))
+                now = time.monotonic()
+                if len(batch) >= 32 or now - last_flush > 0.2:
+                    self.update_status_signal.emit("<br>".join(batch), True)
+                    batch.clear()
+                    last_flush = now
+            if batch:
+                self.update_status_signal.emit("<br>".join(batch), True)
         except Exception as e:
             self.update_status_signal.emit(f"[!] Stderr logging thread error: {e}", True)
         finally:
             pipe.close()
 
+    def _get_monitor_source(self, refresh=False):
+        """Returns the PulseAudio monitor source, probing pactl only once.
+
+        Stream restarts (mute toggle, encoder change) happen often enough
+        that forking pactl each time is wasteful; the default sink rarely
+        changes while the server runs. Pass refresh=True to re-probe.
+        """
+        if self._cached_monitor_source is None or refresh:
+            try:
+                sink = subprocess.check_output(['pactl', 'get-default-sink'], text=True).strip()
+                self._cached_monitor_source = f"{sink}.monitor" if sink else None
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                self._cached_monitor_source = None
+        return self._cached_monitor_source
+
     def stream_ffmpeg(self):
         """Captures screen and audio with FFmpeg and streams it as a single MPEG-TS stream."""
         if not shutil.which('ffmpeg'):
             self.update_status_signal.emit("[!] Cannot start stream: ffmpeg executable not found.", True)
             return
 
-        rate = self.screen_capture_rate
-        encoder = self.ffmpeg_encoder
-        is_muted = self.is_muted
+        s = self.snapshot_settings()
+        rate = s.screen_capture_rate
+        encoder = s.ffmpeg_encoder
+        is_muted = s.is_muted
         self.update_status_signal.emit(f"[*] Starting FFmpeg stream at {rate} FPS using '{encoder}'...", False)
 
+        grab_pre, grab_post = self._ffmpeg_grab
         command = ['ffmpeg', '-y', '-loglevel', 'error']
-
-        if sys.platform == "win32":
-            command.extend(['-f', 'gdigrab', '-framerate', str(rate), '-i', 'desktop'])
-        elif sys.platform == "darwin":
-            command.extend(['-f', 'avfoundation', '-framerate', str(rate), '-i', '1:0'])
-        else: # Linux
-            display = os.environ.get('DISPLAY', ':0')
-            # Capture the specific monitor area defined by monitor_dims
-            command.extend(['-f', 'x11grab', '-video_size', f"{self.monitor_dims['width']}x{self.monitor_dims['height']}",
-                            '-framerate', str(rate), '-i', f"{display}+{self.monitor_dims['left']},{self.monitor_dims['top']}"])
+        if encoder.endswith('_vaapi'):
+            # x11grab stays as the capture source (kmsgrab needs DRM-master
+            # privileges); frames are uploaded once and encoded on the GPU.
+            command.extend(['-init_hw_device', 'vaapi=va:/dev/dri/renderD128',
+                            '-filter_hw_device', 'va'])
+        command.extend([*grab_pre, str(rate), *grab_post])
 
         audio_input_configured = False
         if not is_muted:
-            if sys.platform == "win32":
-                command.extend(['-f', 'dshow', '-i', 'audio=Stereo Mix'])
-                audio_input_configured = True
-            elif sys.platform == "darwin":
-                command.extend(['-f', 'avfoundation', '-i', 'none:0'])
+            if self._ffmpeg_audio_in is not None:
+                command.extend(self._ffmpeg_audio_in)
                 audio_input_configured = True
             else: # Linux
-                try:
-                    pactl_output = subprocess.check_output(['pactl', 'get-default-sink'], text=True).strip()
-                    monitor_source = f"{pactl_output}.monitor"
+                monitor_source = self._get_monitor_source()
+                if monitor_source:
                     command.extend(['-f', 'pulse', '-i', monitor_source])
                     audio_input_configured = True
                     self.update_status_signal.emit(f"[*] FFmpeg using PulseAudio monitor: {monitor_source}", False)
-                except (subprocess.CalledProcessError, FileNotFoundError):
+                else:
                     self.update_status_signal.emit("[!] Could not find PulseAudio default sink. FFmpeg will run without audio.", True)
 
+        if encoder.endswith('_vaapi'):
+            command.extend(['-vf', 'format=nv12,hwupload'])
         command.extend(['-c:v', encoder])
         command.extend(['-g', str(rate * 2)])
-        if encoder == 'libx264':
-            command.extend(['-preset', 'ultrafast', '-tune', 'zerolatency', '-crf', '28'])
-        else:
-            command.extend(['-preset', 'p1', '-tune', 'll', '-b:v', '8M'])
+        command.extend(ENCODER_TUNE_ARGS.get(encoder, ['-preset', 'p1', '-tune', 'll', '-b:v', '8M']))
 
         if audio_input_configured:
             command.extend(['-c:a', 'libopus', '-b:a', '128k', '-ar', str(RATE), '-ac', str(CHANNELS)])
@@ -699,26 +1268,89 @@ class RemoteDesktopServer(QObject):
 
         command.extend(['-f', 'mpegts', 'pipe:1'])
 
+        # On POSIX the client socket fd can be ffmpeg's stdout directly, so
+        # the muxer writes TS packets straight to the wire and Python leaves
+        # the data path entirely. Windows sockets aren't usable as process
+        # stdio, so it keeps the pipe + relay loop.
+        direct_out = sys.platform != "win32" and self.client_conn is not None
+
         try:
             self.media_process = subprocess.Popen(
-                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL, bufsize=0
+                command,
+                stdout=self.client_conn.fileno() if direct_out else subprocess.PIPE,
+                stderr=subprocess.PIPE, stdin=subprocess.DEVNULL, bufsize=0
             )
+            if not direct_out and fcntl is not None:
+                # Grow the stdout pipe from the 64 KiB default to 1 MiB so
+                # ffmpeg doesn't block on write between our reads; the
+                # accept-time SO_SNDBUF bump gives the socket side matching
+                # headroom. F_SETPIPE_SZ = 1031.
+                try:
+                    fcntl.fcntl(self.media_process.stdout.fileno(), 1031, 1 << 20)
+                except OSError:
+                    pass # Capped by /proc/sys/fs/pipe-max-size; default size still works
             stderr_thread = threading.Thread(target=self._log_stderr, args=(self.media_process.stderr,), daemon=True)
             stderr_thread.start()
 
-            while self.is_running and not self._stop_stream_event.is_set():
-                if self.client_conn is None or self.media_process.poll() is not None: break
-                chunk = self.media_process.stdout.read(CHUNK * 4)
-                if not chunk:
-                    if self.media_process.poll() is not None: break
-                    time.sleep(0.01)
-                    continue
-                try:
-                    self.client_conn.sendall(chunk)
-                except (BrokenPipeError, ConnectionResetError, OSError) as e:
-                    self.update_status_signal.emit(f"[*] Client (FFmpeg mode) disconnected during send: {e}", False)
-                    self._stop_heartbeat_event.set()
-                    break
+            if direct_out:
+                # No relay: just watch for session end. ffmpeg exits on
+                # EPIPE when the client drops the connection.
+                while self.is_running and not self._stop_stream_event.is_set():
+                    if self.client_conn is None: break
+                    if self.media_process.poll() is not None:
+                        self.update_status_signal.emit("[*] FFmpeg process exited (client likely disconnected).", False)
+                        self._stop_heartbeat_event.set()
+                        break
+                    self._stop_stream_event.wait(0.5)
+            elif hasattr(os, 'splice'):
+                # Move pages from the ffmpeg pipe straight into the socket
+                # inside the kernel: no userspace copy, one syscall per chunk
+                # and no bytes objects on the Python heap. Blocking splice
+                # lets the pipe back-pressure ffmpeg naturally, and
+                # SPLICE_F_MORE hints the kernel to coalesce TS packets into
+                # full segments.
+                #
+                # An io_uring pump (queued IORING_OP_SPLICE SQEs) would shave
+                # the remaining syscall-per-chunk, but there is no liburing
+                # binding in the stdlib and pulling one in as a dependency is
+                # not worth it for a relay that already does zero-copy page
+                # moves; revisit if os.io_uring ever lands.
+                pipe_fd = self.media_process.stdout.fileno()
+                sock_fd = self.client_conn.fileno()
+                splice_flags = os.SPLICE_F_MOVE | os.SPLICE_F_MORE
+                read_size = stream_read_size(self.client_conn)
+                while self.is_running and not self._stop_stream_event.is_set():
+                    if self.client_conn is None or self.media_process.poll() is not None: break
+                    try:
+                        moved = os.splice(pipe_fd, sock_fd, read_size, flags=splice_flags)
+                    except (BrokenPipeError, ConnectionResetError, OSError) as e:
+                        self.update_status_signal.emit(f"[*] Client (FFmpeg mode) disconnected during send: {e}", False)
+                        self._stop_heartbeat_event.set()
+                        break
+                    if moved == 0: break # ffmpeg closed its end of the pipe
+            else:
+                # Portable fallback. An unbuffered read returns whatever the
+                # pipe holds up to the request size, so asking for 64 KiB
+                # batches several encoder writes into one read+send pair
+                # instead of syscalling per 4 KiB block; TCP_NODELAY is
+                # already set so full batches go out immediately. readinto a
+                # preallocated buffer keeps the loop free of per-iteration
+                # bytes allocations.
+                relay_buf = bytearray(stream_read_size(self.client_conn))
+                relay_view = memoryview(relay_buf)
+                while self.is_running and not self._stop_stream_event.is_set():
+                    if self.client_conn is None or self.media_process.poll() is not None: break
+                    received = self.media_process.stdout.readinto(relay_buf)
+                    if not received:
+                        if self.media_process.poll() is not None: break
+                        time.sleep(0.01)
+                        continue
+                    try:
+                        self.client_conn.sendall(relay_view[:received])
+                    except (BrokenPipeError, ConnectionResetError, OSError) as e:
+                        self.update_status_signal.emit(f"[*] Client (FFmpeg mode) disconnected during send: {e}", False)
+                        self._stop_heartbeat_event.set()
+                        break
         except FileNotFoundError:
             self.update_status_signal.emit("[!] CRITICAL: 'ffmpeg' command failed.", True)
         except Exception as e:
@@ -730,16 +1362,15 @@ class RemoteDesktopServer(QObject):
             self.update_status_signal.emit("[*] FFmpeg stream stopped.", False)
 
     def stream_audio(self):
-        """Captures desktop audio using parec and streams it. (LEGACY MODE)"""
-        if not self.audio_client_conn: return
-        try:
-            if not shutil.which('parec'):
-                self.update_status_signal.emit("[!] ERROR: 'parec' not found.", True)
-                return
-            pactl_output = subprocess.check_output(['pactl', 'get-default-sink'], text=True).strip()
-            monitor_source = f"{pactl_output}.monitor"
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            self.update_status_signal.emit(f"[!] Could not determine audio source for parec: {e}.", True)
+        """Captures desktop audio using parec and streams it as tagged
+        frames interleaved with video on the client connection. (LEGACY MODE)"""
+        if not self.client_conn: return
+        if not shutil.which('parec'):
+            self.update_status_signal.emit("[!] ERROR: 'parec' not found.", True)
+            return
+        monitor_source = self._get_monitor_source()
+        if not monitor_source:
+            self.update_status_signal.emit("[!] Could not determine audio source for parec.", True)
             return
 
         command = ['parec','--device', monitor_source, f'--format={FORMAT_STR}', f'--rate={RATE}', f'--channels={CHANNELS}']
@@ -754,7 +1385,8 @@ class RemoteDesktopServer(QObject):
                     break
                 if not self.is_muted:
                     try:
-                        self.audio_client_conn.sendall(audio_data)
+                        with self._legacy_send_lock:
+                            send_framed(self.client_conn, audio_data, tag=TAG_AUDIO)
                     except (BrokenPipeError, ConnectionResetError, OSError) as e:
                         self.update_status_signal.emit(f"[*] Client audio disconnected: {e}", False)
                         self._stop_heartbeat_event.set()
@@ -767,16 +1399,161 @@ class RemoteDesktopServer(QObject):
             self.update_status_signal.emit("[*] Legacy audio stream stopped.", False)
 
     def stream_screen(self):
-        """Dispatches to the correct screen streaming method based on session type. (LEGACY MODE)"""
-        if self.session_type == 'wayland': self.stream_screen_wayland()
+        """Dispatches to the correct screen streaming method based on platform and session type. (LEGACY MODE)"""
+        if sys.platform == 'win32' and DXCAM_SUPPORT: self.stream_screen_dxcam()
+        elif self.session_type == 'wayland': self.stream_screen_wayland()
         else: self.stream_screen_x11()
 
+    def stream_screen_dxcam(self):
+        """Captures screen on Windows using dxcam and streams as JPEG."""
+        if not self.client_conn: return
+        # One reusable encode buffer for the whole session; the JPEG goes out
+        # with a plain gather write (the kernel copies during sendmsg), so
+        # reusing the backing buffer next frame is safe.
+        jpeg_bio = io.BytesIO()
+        camera = None
+        try:
+            # One persistent capture session; get_latest_frame() blocks until
+            # a new frame is ready, so dxcam paces the loop at target_fps.
+            camera = dxcam.create(output_color='RGB')
+            camera.start(target_fps=self.screen_capture_rate)
+            while self.is_running and not self._stop_stream_event.is_set():
+                try:
+                    s = self.snapshot_settings()
+                    quality = s.jpeg_quality
+                    frame = camera.get_latest_frame()
+                    pil_img = Image.fromarray(frame)
+                    jpeg_bio.seek(0)
+                    jpeg_bio.truncate()
+                    pil_img.save(jpeg_bio, format='jpeg', quality=quality)
+                    mv = jpeg_bio.getbuffer()
+                    try:
+                        with self._legacy_send_lock:
+                            send_framed(self.client_conn, mv, tag=TAG_VIDEO)
+                    finally:
+                        mv.release() # BytesIO can't truncate while exported
+                except (socket.error, ConnectionResetError, BrokenPipeError) as e:
+                    self.update_status_signal.emit(f"[*] Client (dxcam) disconnected: {e}", False)
+                    self._stop_heartbeat_event.set()
+                    break
+                except Exception as e:
+                    if self.is_running: self.update_status_signal.emit(f"[!] dxcam streaming error: {e}", True)
+                    break
+        except Exception as e:
+            self.update_status_signal.emit(f"[!] dxcam initialization error: {e}.", True)
+        finally:
+            if camera is not None:
+                try: camera.stop()
+                except Exception: pass
+        self.update_status_signal.emit("[*] dxcam screen stream stopped.", False)
+
+    def _stream_wayland_wfrecorder(self):
+        """Streams Wayland frames from one persistent wf-recorder pipeline.
+
+        wf-recorder writes raw BGRX frames continuously to its stdout, so
+        capture costs no fork/exec, temp file or PNG round-trip per frame —
+        the pipe read paces the loop at the compositor's frame rate and the
+        encoder back-pressures the recorder when it falls behind.
+
+        Returns True once frames have flowed (caller must not fall back) and
+        False if the pipeline never produced a frame, e.g. the portal denied
+        capture, so the per-frame screenshot tools get their chance.
+        """
+        width = self.monitor_dims['width']
+        height = self.monitor_dims['height']
+        frame_size = width * height * 4
+        command = ['wf-recorder', '-m', 'rawvideo', '-c', 'rawvideo',
+                   '-x', 'bgr0', '-f', '/dev/stdout']
+        try:
+            cap = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL,
+                                   stdin=subprocess.DEVNULL, bufsize=0)
+        except OSError:
+            return False
+        # Expose the recorder to session teardown: wlroots screencopy is
+        # damage-driven, so on a static screen the readinto below blocks
+        # until teardown terminates the process and EOFs the pipe.
+        self.media_process = cap
+
+        raw = bytearray(frame_size) # One persistent frame buffer
+        view = memoryview(raw)
+        sender = ZeroCopySender(self.client_conn, tag=TAG_VIDEO)
+        jpeg_bio = io.BytesIO()
+        last_digest = None
+        streamed_any = False
+        try:
+            while self.is_running and not self._stop_stream_event.is_set():
+                got = 0
+                while got < frame_size:
+                    n = cap.stdout.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+                if got < frame_size:
+                    break # Recorder exited (or never started producing)
+                if self._stop_stream_event.is_set():
+                    break # Teardown raced the blocking read; don't touch the socket
+                if not streamed_any:
+                    streamed_any = True
+                    self.update_status_signal.emit("[*] Wayland capture using persistent wf-recorder pipeline.", False)
+                digest = _frame_digest(raw)
+                if digest == last_digest:
+                    continue # Static screen; the next read paces the loop
+                last_digest = digest
+                quality = self.snapshot_settings().jpeg_quality
+                try:
+                    if TURBOJPEG_SUPPORT:
+                        frame = numpy.frombuffer(raw, dtype=numpy.uint8).reshape(height, width, 4)
+                        img_bytes = _turbojpeg.encode(
+                            frame, quality=quality,
+                            pixel_format=TJPF_BGRX, jpeg_subsample=TJSAMP_420)
+                        with self._legacy_send_lock:
+                            sender.send(img_bytes)
+                    else:
+                        pil_img = Image.frombytes('RGB', (width, height), bytes(raw), 'raw', 'BGRX')
+                        jpeg_bio.seek(0)
+                        jpeg_bio.truncate()
+                        pil_img.save(jpeg_bio, format='jpeg', quality=quality)
+                        mv = jpeg_bio.getbuffer()
+                        try:
+                            with self._legacy_send_lock:
+                                send_framed(self.client_conn, mv, tag=TAG_VIDEO)
+                        finally:
+                            mv.release()
+                except (socket.error, ConnectionResetError, BrokenPipeError) as e:
+                    self.update_status_signal.emit(f"[*] Client (Wayland) disconnected: {e}", False)
+                    self._stop_heartbeat_event.set()
+                    break
+        finally:
+            if cap.poll() is None:
+                cap.terminate()
+                try:
+                    cap.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    cap.kill()
+            if self.media_process is cap:
+                self.media_process = None
+        return streamed_any
+
     def stream_screen_wayland(self):
         """Captures screen on Wayland using an external tool and streams as JPEG."""
         if not self.client_conn: return
+        # Prefer one long-lived wf-recorder pipeline over forking a
+        # screenshot tool per frame; fall through to the per-frame tools
+        # only if it never produced a frame.
+        if shutil.which('wf-recorder'):
+            if self._stream_wayland_wfrecorder():
+                self.update_status_signal.emit("[*] Wayland screen stream stopped.", False)
+                return
+            self.update_status_signal.emit("[!] wf-recorder produced no frames; falling back to per-frame capture.", True)
+        # Reused across frames; sent with a plain gather write so the backing
+        # buffer can be truncated for the next frame (see dxcam path).
+        jpeg_bio = io.BytesIO()
+        last_digest = None
         while self.is_running and not self._stop_stream_event.is_set():
             try:
-                rate, quality = self.screen_capture_rate, self.jpeg_quality
+                s = self.snapshot_settings()
+                rate, quality = s.screen_capture_rate, s.jpeg_quality
                 command_map = {
                     'flameshot': ['flameshot', 'full', '--raw'],
                     'gnome-screenshot': ['gnome-screenshot', '-f', '/tmp/rd_screenshot.png'],
@@ -795,13 +1572,24 @@ class RemoteDesktopServer(QObject):
                     os.remove('/tmp/rd_screenshot.png')
                 else: raw_image_data = result.stdout
 
-                pil_img = Image.open(io.BytesIO(raw_image_data)).convert('RGB')
-                img_buffer_out = io.BytesIO()
-                pil_img.save(img_buffer_out, format='jpeg', quality=quality)
-                img_bytes = img_buffer_out.getvalue()
+                # The screenshot tools emit deterministic PNG/PPM, so equal
+                # bytes mean an unchanged screen: skip decode, encode, send.
+                digest = _frame_digest(raw_image_data)
+                if digest == last_digest:
+                    time.sleep(1 / rate if rate > 0 else 1)
+                    continue
+                last_digest = digest
 
-                self.client_conn.sendall(struct.pack('>I', len(img_bytes)))
-                self.client_conn.sendall(img_bytes)
+                pil_img = Image.open(io.BytesIO(raw_image_data)).convert('RGB')
+                jpeg_bio.seek(0)
+                jpeg_bio.truncate()
+                pil_img.save(jpeg_bio, format='jpeg', quality=quality)
+                mv = jpeg_bio.getbuffer()
+                try:
+                    with self._legacy_send_lock:
+                        send_framed(self.client_conn, mv, tag=TAG_VIDEO)
+                finally:
+                    mv.release()
                 time.sleep(1 / rate if rate > 0 else 1)
             except (subprocess.CalledProcessError, socket.error, ConnectionResetError, BrokenPipeError, subprocess.TimeoutExpired) as e:
                 self.update_status_signal.emit(f"[*] Client (Wayland) disconnected or error: {e}", False)
@@ -815,19 +1603,52 @@ class RemoteDesktopServer(QObject):
     def stream_screen_x11(self):
         """Captures screen on X11 using MSS and streams as JPEG."""
         if not self.client_conn: return
+        sender = ZeroCopySender(self.client_conn, tag=TAG_VIDEO)
+        jpeg_bio = io.BytesIO() # Reused by the Pillow fallback encode
+        last_digest = None
         display = os.environ.get('DISPLAY')
         try:
+            # mss reuses its internal XImage buffer across grabs of a
+            # constant region, so capture is already a single copy into a
+            # persistent buffer per frame; a hand-rolled MIT-SHM segment
+            # would only save the X round trip, not the copy.
             with mss.mss(display=display) as sct:
+                monitor = self.monitor_dims
                 while self.is_running and not self._stop_stream_event.is_set():
                     try:
-                        rate, quality = self.screen_capture_rate, self.jpeg_quality
-                        sct_img = sct.grab(self.monitor_dims)
-                        pil_img = Image.frombytes('RGB', sct_img.size, sct_img.bgra, 'raw', 'BGRX')
-                        img_buffer = io.BytesIO()
-                        pil_img.save(img_buffer, format='jpeg', quality=quality)
-                        img_bytes = img_buffer.getvalue()
-                        self.client_conn.sendall(struct.pack('>I', len(img_bytes)))
-                        self.client_conn.sendall(img_bytes)
+                        s = self.snapshot_settings()
+                        rate, quality = s.screen_capture_rate, s.jpeg_quality
+                        sct_img = sct.grab(monitor)
+                        digest = _frame_digest(sct_img.raw)
+                        if digest == last_digest:
+                            # Static screen: skip the encode and the send
+                            time.sleep(1 / rate if rate > 0 else 1)
+                            continue
+                        last_digest = digest
+                        if TURBOJPEG_SUPPORT:
+                            frame = numpy.frombuffer(sct_img.raw, dtype=numpy.uint8)
+                            frame = frame.reshape(sct_img.height, sct_img.width, 4)
+                            img_bytes = _turbojpeg.encode(
+                                frame, quality=quality,
+                                pixel_format=TJPF_BGRX, jpeg_subsample=TJSAMP_420)
+                            # Fresh bytes each frame, safe to hand to the
+                            # zero-copy sender which parks them in flight.
+                            with self._legacy_send_lock:
+                                sender.send(img_bytes)
+                        else:
+                            # frombuffer wraps the grab buffer in place;
+                            # .bgra/frombytes would copy the full frame first.
+                            pil_img = Image.frombuffer('RGB', sct_img.size, sct_img.raw, 'raw', 'BGRX', 0, 1)
+                            jpeg_bio.seek(0)
+                            jpeg_bio.truncate()
+                            pil_img.save(jpeg_bio, format='jpeg', quality=quality)
+                            mv = jpeg_bio.getbuffer()
+                            try:
+                                # Reused buffer, so plain (copying) gather send
+                                with self._legacy_send_lock:
+                                    send_framed(self.client_conn, mv, tag=TAG_VIDEO)
+                            finally:
+                                mv.release()
                         time.sleep(1 / rate if rate > 0 else 1)
                     except (mss.exception.ScreenShotError, socket.error, ConnectionResetError, BrokenPipeError) as e:
                         self.update_status_signal.emit(f"[*] Client (X11) disconnected: {e}", False)
@@ -857,337 +1678,342 @@ class RemoteDesktopServer(QObject):
             except subprocess.TimeoutExpired: self.media_process.kill()
             self.media_process = None
 
-        def close_socket(sock):
-            if sock:
-                try: sock.shutdown(socket.SHUT_RDWR)
-                except OSError: pass
-                try: sock.close()
-                except OSError: pass
-
-        close_socket(self.client_conn)
+        _safe_close(self.client_conn)
         self.client_conn = None
-        close_socket(self.audio_client_conn)
-        self.audio_client_conn = None
-        close_socket(self.control_client_conn)
+        _safe_close(self.control_client_conn)
         self.control_client_conn = None
-        close_socket(self.server_socket)
+        _safe_close(self.server_socket)
         self.server_socket = None
-        close_socket(self.audio_socket)
-        self.audio_socket = None
-        close_socket(self.control_socket_listener)
+        _safe_close(self.control_socket_listener)
         self.control_socket_listener = None
 
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
         self._save_settings()
         self.update_status_signal.emit("[*] Server stopped.", False)
         self.server_stopped_signal.emit()
 
 
-class ServerWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("PyQt6 Remote Desktop Server")
-        self.setGeometry(100, 100, 600, 750)
-        self.server = RemoteDesktopServer()
-        self.server_thread = QThread()
-        self.server.moveToThread(self.server_thread)
-        self.tray_icon = None
-
-        # Connect server signals to GUI slots
-        self.server.update_status_signal.connect(self.update_status)
-        self.server.server_stopped_signal.connect(self.on_server_stopped)
-        self.server.client_connected_signal.connect(self.on_client_connected)
-        self.server.client_disconnected_signal.connect(self.on_client_disconnected)
-        self.server.server_startup_failed_signal.connect(self.on_server_startup_failed)
-
-        # Connect thread start/finish signals
-        self.server_thread.started.connect(self.server.run_server)
-        self.server_thread.finished.connect(self.server_thread.deleteLater)
-
-        self._setup_ui()
-        self._setup_tray_icon()
-        self._check_initial_dependencies()
-
-        # Start server automatically after UI is set up
-        QTimer.singleShot(100, self.start_server)
-
-
-    def _setup_ui(self):
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QVBoxLayout(central_widget)
-
-        self.status_log = QTextEdit()
-        self.status_log.setReadOnly(True)
-        self.status_log.setMaximumHeight(200) # Increased height
-        main_layout.addWidget(self.status_log)
-
-        # IP Address Display
-        ip_group = QGroupBox("Server IP Address")
-        ip_layout = QHBoxLayout()
-        ip_group.setLayout(ip_layout)
-        ip_label_text = QLabel("Connect client to:")
-        ip_label_text.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        self.ip_label = QLabel(get_local_ip())
-        self.ip_label.setFont(QFont("Arial", 14, QFont.Weight.Bold))
-        self.ip_label.setStyleSheet("color: blue;")
-        ip_layout.addWidget(ip_label_text)
-        ip_layout.addWidget(self.ip_label)
-        ip_layout.addStretch(1)
-        main_layout.addWidget(ip_group)
-
-        # Encoder Mode selection
-        encoder_group = QGroupBox("Encoder Mode")
-        encoder_layout = QHBoxLayout()
-        encoder_group.setLayout(encoder_layout)
-
-        self.ffmpeg_encoder_name, ffmpeg_mode_label = detect_video_encoder(self.update_status)
-
-        self.encoder_mode_group = QButtonGroup(self) # Use QButtonGroup to manage radio buttons
-        self.legacy_rb = QRadioButton("Legacy (Slow)")
-        self.ffmpeg_rb = QRadioButton(ffmpeg_mode_label)
-
-        self.encoder_mode_group.addButton(self.legacy_rb, 0) # ID 0 for Legacy
-        self.encoder_mode_group.addButton(self.ffmpeg_rb, 1) # ID 1 for FFmpeg
-
-        encoder_layout.addWidget(self.legacy_rb)
-        encoder_layout.addWidget(self.ffmpeg_rb)
-        encoder_layout.addStretch(1)
-        main_layout.addWidget(encoder_group)
-
-        # Set initial selection based on loaded settings
-        if self.server.encoder_mode.startswith("FFmpeg") and self.ffmpeg_encoder_name:
-            self.ffmpeg_rb.setChecked(True)
-        else:
-            self.legacy_rb.setChecked(True)
-            self.server.encoder_mode = "Legacy (Slow)" # Ensure internal state matches if FFmpeg unavailable
-
-        if not self.ffmpeg_encoder_name: # Disable FFmpeg option if not available
-            self.ffmpeg_rb.setEnabled(False)
-
-        self.encoder_mode_group.idClicked.connect(self.update_encoder_mode)
-
-
-        # Streaming Settings
-        settings_group = QGroupBox("Streaming Settings")
-        settings_layout = QVBoxLayout()
-        settings_group.setLayout(settings_layout)
-
-        quality_layout = QHBoxLayout()
-        quality_layout.addWidget(QLabel("JPEG Quality (Legacy Only):"))
-        self.quality_slider = QSlider(Qt.Orientation.Horizontal)
-        self.quality_slider.setRange(10, 100)
-        self.quality_slider.setValue(self.server.jpeg_quality)
-        self.quality_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.quality_slider.setTickInterval(10)
-        self.quality_value_label = QLabel(str(self.server.jpeg_quality))
-        quality_layout.addWidget(self.quality_slider)
-        quality_layout.addWidget(self.quality_value_label)
-        settings_layout.addLayout(quality_layout)
-        self.quality_slider.valueChanged.connect(self.update_quality)
-
-        rate_layout = QHBoxLayout()
-        self.rate_label = QLabel("Capture Rate (FPS):")
-        rate_layout.addWidget(self.rate_label)
-        self.rate_slider = QSlider(Qt.Orientation.Horizontal)
-        self.rate_slider.setRange(1, 60)
-        self.rate_slider.setValue(self.server.screen_capture_rate)
-        self.rate_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.rate_slider.setTickInterval(5)
-        self.rate_value_label = QLabel(str(self.server.screen_capture_rate))
-        rate_layout.addWidget(self.rate_slider)
-        rate_layout.addWidget(self.rate_value_label)
-        settings_layout.addLayout(rate_layout)
-        self.rate_slider.valueChanged.connect(self.update_rate)
-        main_layout.addWidget(settings_group)
-
-
-        # Audio Settings
-        audio_group = QGroupBox("Audio Settings")
-        audio_layout = QVBoxLayout()
-        audio_group.setLayout(audio_layout)
-        self.mute_checkbox = QCheckBox("Mute Audio Stream")
-        self.mute_checkbox.setChecked(self.server.is_muted)
-        audio_layout.addWidget(self.mute_checkbox)
-        self.mute_checkbox.toggled.connect(self.toggle_mute)
-        main_layout.addWidget(audio_group)
-
-        # Status Log
-        status_group = QGroupBox("Status Log")
-        status_layout = QVBoxLayout()
-        status_group.setLayout(status_layout)
-        status_layout.addWidget(self.status_log)
-        main_layout.addWidget(status_group, 1) # Expand vertically
-
-        self.update_encoder_mode(self.encoder_mode_group.checkedId()) # Initial call to set states
-
-
-    def _setup_tray_icon(self):
-        if platform.system() == "Linux":
-            self.tray_icon = QSystemTrayIcon(self)
-            self.tray_icon.setIcon(QIcon(":/icon.png")) # Placeholder for icon
-            self.tray_icon.setToolTip("Remote Desktop Server")
-
-            tray_menu = QMenu()
-            show_action = tray_menu.addAction("Show Window")
-            hide_action = tray_menu.addAction("Hide Window")
-            quit_action = tray_menu.addAction("Quit")
-
-            show_action.triggered.connect(self.showNormal)
-            hide_action.triggered.connect(self.hide)
-            quit_action.triggered.connect(QCoreApplication.quit)
-
-            self.tray_icon.setContextMenu(tray_menu)
-            self.tray_icon.activated.connect(self.on_tray_icon_activated)
-            self.tray_icon.show()
-        else:
+if __name__ == "__main__":
+    from PyQt6.QtWidgets import (
+        QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+        QPushButton, QLineEdit, QLabel, QTextEdit, QFrame, QMessageBox,
+        QSlider, QCheckBox, QRadioButton, QGroupBox, QSystemTrayIcon, QMenu,
+        QButtonGroup
+    )
+    from PyQt6.QtGui import QIcon, QPixmap, QFont, QAction
+
+    class ServerWindow(QMainWindow):
+        def __init__(self):
+            super().__init__()
+            self.setWindowTitle("PyQt6 Remote Desktop Server")
+            self.setGeometry(100, 100, 600, 750)
+            self.server = RemoteDesktopServer()
+            self.server_thread = QThread()
+            self.server.moveToThread(self.server_thread)
             self.tray_icon = None
 
-    def _check_initial_dependencies(self):
-        # Initial checks, similar to client
-        if sys.platform == "linux":
-            if os.environ.get("XDG_SESSION_TYPE") == "wayland":
-                QMessageBox.warning(self, "Environment Warning", "You appear to be running a Wayland session. Legacy mode may require a compatible screenshot tool.")
-            if not shutil.which('parec') or not shutil.which('pactl'):
-                QMessageBox.warning(self, "Dependency Warning", "'parec' or 'pactl' not found. Audio in Legacy mode will be disabled.")
-        if not shutil.which('ffmpeg'):
-            QMessageBox.warning(self, "Dependency Warning", "ffmpeg was not found in your system's PATH. FFmpeg mode will be unavailable.")
-        if not PILLOW_SUPPORT:
-            QMessageBox.critical(self, "Dependency Error", "Pillow library not found. Legacy mode is unavailable.")
-            # Disable legacy options if Pillow is missing
-            self.legacy_rb.setEnabled(False)
-            self.quality_slider.setEnabled(False)
-        if not PYNPUT_SUPPORT:
-            QMessageBox.warning(self, "Dependency Warning", "'pynput' library not found. Remote control features will be disabled on the server side.")
-            # No need to disable UI elements related to control as there are none on server.
-
-    def start_server(self):
-        """Starts the RemoteDesktopServer in its own QThread."""
-        if not self.server_thread.isRunning():
-            self.server_thread.start()
-        else:
-            self.update_status("[*] Server thread already running.", False)
+            # Connect server signals to GUI slots
+            self.server.update_status_signal.connect(self.update_status)
+            self.server.server_stopped_signal.connect(self.on_server_stopped)
+            self.server.client_connected_signal.connect(self.on_client_connected)
+            self.server.client_disconnected_signal.connect(self.on_client_disconnected)
+            self.server.server_startup_failed_signal.connect(self.on_server_startup_failed)
+
+            # Connect thread start/finish signals
+            self.server_thread.started.connect(self.server.run_server)
+            self.server_thread.finished.connect(self.server_thread.deleteLater)
+
+            self._setup_ui()
+            self._setup_tray_icon()
+            self._check_initial_dependencies()
+
+            # Start server automatically after UI is set up
+            QTimer.singleShot(100, self.start_server)
+
+
+        def _setup_ui(self):
+            central_widget = QWidget()
+            self.setCentralWidget(central_widget)
+            main_layout = QVBoxLayout(central_widget)
+
+            self.status_log = QTextEdit()
+            self.status_log.setReadOnly(True)
+            self.status_log.setMaximumHeight(200) # Increased height
+            # Bound the document so appends stay O(1) during long sessions
+            self.status_log.document().setMaximumBlockCount(500)
+            main_layout.addWidget(self.status_log)
+
+            # IP Address Display
+            ip_group = QGroupBox("Server IP Address")
+            ip_layout = QHBoxLayout()
+            ip_group.setLayout(ip_layout)
+            ip_label_text = QLabel("Connect client to:")
+            ip_label_text.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+            self.ip_label = QLabel(get_local_ip())
+            self.ip_label.setFont(QFont("Arial", 14, QFont.Weight.Bold))
+            self.ip_label.setStyleSheet("color: blue;")
+            ip_layout.addWidget(ip_label_text)
+            ip_layout.addWidget(self.ip_label)
+            ip_layout.addStretch(1)
+            main_layout.addWidget(ip_group)
+
+            # Encoder Mode selection
+            encoder_group = QGroupBox("Encoder Mode")
+            encoder_layout = QHBoxLayout()
+            encoder_group.setLayout(encoder_layout)
+
+            self.ffmpeg_encoder_name, ffmpeg_mode_label = detect_video_encoder(self.update_status, self.server.config)
+
+            self.encoder_mode_group = QButtonGroup(self) # Use QButtonGroup to manage radio buttons
+            self.legacy_rb = QRadioButton("Legacy (Slow)")
+            self.ffmpeg_rb = QRadioButton(ffmpeg_mode_label)
+
+            self.encoder_mode_group.addButton(self.legacy_rb, 0) # ID 0 for Legacy
+            self.encoder_mode_group.addButton(self.ffmpeg_rb, 1) # ID 1 for FFmpeg
+
+            encoder_layout.addWidget(self.legacy_rb)
+            encoder_layout.addWidget(self.ffmpeg_rb)
+            encoder_layout.addStretch(1)
+            main_layout.addWidget(encoder_group)
+
+            # Set initial selection based on loaded settings
+            if self.server.encoder_mode.startswith("FFmpeg") and self.ffmpeg_encoder_name:
+                self.ffmpeg_rb.setChecked(True)
+            else:
+                self.legacy_rb.setChecked(True)
+                self.server.encoder_mode = "Legacy (Slow)" # Ensure internal state matches if FFmpeg unavailable
+
+            if not self.ffmpeg_encoder_name: # Disable FFmpeg option if not available
+                self.ffmpeg_rb.setEnabled(False)
+
+            self.encoder_mode_group.idClicked.connect(self.update_encoder_mode)
+
+
+            # Streaming Settings
+            settings_group = QGroupBox("Streaming Settings")
+            settings_layout = QVBoxLayout()
+            settings_group.setLayout(settings_layout)
+
+            quality_layout = QHBoxLayout()
+            quality_layout.addWidget(QLabel("JPEG Quality (Legacy Only):"))
+            self.quality_slider = QSlider(Qt.Orientation.Horizontal)
+            self.quality_slider.setRange(10, 100)
+            self.quality_slider.setValue(self.server.jpeg_quality)
+            self.quality_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
+            self.quality_slider.setTickInterval(10)
+            self.quality_value_label = QLabel(str(self.server.jpeg_quality))
+            quality_layout.addWidget(self.quality_slider)
+            quality_layout.addWidget(self.quality_value_label)
+            settings_layout.addLayout(quality_layout)
+            self.quality_slider.valueChanged.connect(self.update_quality)
+
+            rate_layout = QHBoxLayout()
+            self.rate_label = QLabel("Capture Rate (FPS):")
+            rate_layout.addWidget(self.rate_label)
+            self.rate_slider = QSlider(Qt.Orientation.Horizontal)
+            self.rate_slider.setRange(1, 60)
+            self.rate_slider.setValue(self.server.screen_capture_rate)
+            self.rate_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
+            self.rate_slider.setTickInterval(5)
+            self.rate_value_label = QLabel(str(self.server.screen_capture_rate))
+            rate_layout.addWidget(self.rate_slider)
+            rate_layout.addWidget(self.rate_value_label)
+            settings_layout.addLayout(rate_layout)
+            self.rate_slider.valueChanged.connect(self.update_rate)
+            main_layout.addWidget(settings_group)
+
+
+            # Audio Settings
+            audio_group = QGroupBox("Audio Settings")
+            audio_layout = QVBoxLayout()
+            audio_group.setLayout(audio_layout)
+            self.mute_checkbox = QCheckBox("Mute Audio Stream")
+            self.mute_checkbox.setChecked(self.server.is_muted)
+            audio_layout.addWidget(self.mute_checkbox)
+            self.mute_checkbox.toggled.connect(self.toggle_mute)
+            main_layout.addWidget(audio_group)
+
+            # Status Log
+            status_group = QGroupBox("Status Log")
+            status_layout = QVBoxLayout()
+            status_group.setLayout(status_layout)
+            status_layout.addWidget(self.status_log)
+            main_layout.addWidget(status_group, 1) # Expand vertically
+
+            self.update_encoder_mode(self.encoder_mode_group.checkedId()) # Initial call to set states
+
+
+        def _setup_tray_icon(self):
+            if platform.system() == "Linux":
+                self.tray_icon = QSystemTrayIcon(self)
+                self.tray_icon.setIcon(QIcon(":/icon.png")) # Placeholder for icon
+                self.tray_icon.setToolTip("Remote Desktop Server")
+
+                tray_menu = QMenu()
+                show_action = tray_menu.addAction("Show Window")
+                hide_action = tray_menu.addAction("Hide Window")
+                quit_action = tray_menu.addAction("Quit")
+
+                show_action.triggered.connect(self.showNormal)
+                hide_action.triggered.connect(self.hide)
+                quit_action.triggered.connect(QCoreApplication.quit)
+
+                self.tray_icon.setContextMenu(tray_menu)
+                self.tray_icon.activated.connect(self.on_tray_icon_activated)
+                self.tray_icon.show()
+            else:
+                self.tray_icon = None
+
+        def _check_initial_dependencies(self):
+            # Initial checks, similar to client
+            if sys.platform == "linux":
+                if os.environ.get("XDG_SESSION_TYPE") == "wayland":
+                    QMessageBox.warning(self, "Environment Warning", "You appear to be running a Wayland session. Legacy mode may require a compatible screenshot tool.")
+                if not shutil.which('parec') or not shutil.which('pactl'):
+                    QMessageBox.warning(self, "Dependency Warning", "'parec' or 'pactl' not found. Audio in Legacy mode will be disabled.")
+            if not shutil.which('ffmpeg'):
+                QMessageBox.warning(self, "Dependency Warning", "ffmpeg was not found in your system's PATH. FFmpeg mode will be unavailable.")
+            if not PILLOW_SUPPORT:
+                QMessageBox.critical(self, "Dependency Error", "Pillow library not found. Legacy mode is unavailable.")
+                # Disable legacy options if Pillow is missing
+                self.legacy_rb.setEnabled(False)
+                self.quality_slider.setEnabled(False)
+            if not PYNPUT_SUPPORT:
+                QMessageBox.warning(self, "Dependency Warning", "'pynput' library not found. Remote control features will be disabled on the server side.")
+                # No need to disable UI elements related to control as there are none on server.
+
+        def start_server(self):
+            """Starts the RemoteDesktopServer in its own QThread."""
+            if not self.server_thread.isRunning():
+                self.server_thread.start()
+            else:
+                self.update_status("[*] Server thread already running.", False)
 
 
-    def stop_server(self):
-        """Signals the server to stop and waits for its thread to finish."""
-        if self.server.is_running:
-            self.server.stop_server() # Call server's stop method
-        if self.server_thread.isRunning():
-            self.server_thread.quit()
-            self.server_thread.wait(5000) # Wait up to 5 seconds for thread to finish
+        def stop_server(self):
+            """Signals the server to stop and waits for its thread to finish."""
+            if self.server.is_running:
+                self.server.stop_server() # Call server's stop method
             if self.server_thread.isRunning():
-                self.update_status("[!] Server thread did not terminate gracefully. Force quitting.", True)
-                self.server_thread.terminate() # Force terminate if it hangs
-
-    def update_status(self, message, is_error):
-        """Thread-safe method to update the status log in the GUI."""
-        # This slot is connected to a signal, so it runs in the main GUI thread.
-        color = "red" if is_error else "white"
-        self.status_log.append(f'<span style="color:{color};">{message}</span>')
-        # self.status_log.ensureCursorVisible() # Scrolls to bottom automatically
-
-    def update_encoder_mode(self, radio_id):
-        """Updates the server's encoder mode based on GUI selection."""
-        if radio_id == 0: # Legacy
-            mode = "Legacy (Slow)"
-            is_legacy = True
-        else: # FFmpeg
-            mode = self.ffmpeg_rb.text() # Use the detected label as the mode name
-            is_legacy = False
-
-        self.server.encoder_mode = mode
-
-        # Enable/disable JPEG quality slider based on mode
-        self.quality_slider.setEnabled(is_legacy)
-        self.quality_value_label.setEnabled(is_legacy)
-        # Update label for capture rate based on mode
-        self.rate_label.setText("JPEG Capture Rate (FPS):" if is_legacy else "FFmpeg Refresh Rate (FPS):")
-
-        # If server is running and mode changes between Legacy and FFmpeg, restart stream
-        # for in-session mode switching.
-        # Note: server._restart_media_streams is called from the server's thread
-        # if a client is connected. We just set the mode here.
-        pass
-
-        self.update_rate(self.server.screen_capture_rate) # Update label for rate based on new mode
-
-    def update_quality(self, value):
-        """Updates JPEG quality setting on the server."""
-        self.server.jpeg_quality = value
-        self.quality_value_label.setText(str(value))
-        # No restart needed for Legacy mode; it picks up changes on next frame.
-
-    def update_rate(self, value):
-        """Updates screen capture rate setting on the server."""
-        self.server.screen_capture_rate = value
-        self.rate_value_label.setText(str(value))
-        # IMPORTANT: For FFmpeg, rate changes only apply on connection establishment,
-        # or when explicitly restarting the stream (e.g., mute toggle).
-        # We DO NOT call server.restart_ffmpeg_stream directly here for FFmpeg,
-        # as per requirement "Make the framerate only apply when connection closes and goes back up for FFMPEG".
-        # So, for FFmpeg, we don't call restart_ffmpeg_stream here based on rate slider change.
-        pass # Do nothing, the next connection will pick up the new rate.
-
-
-    def toggle_mute(self, checked):
-        """Toggles audio mute setting on the server."""
-        self.server.is_muted = checked
-        status = "Muted" if checked else "Unmuted"
-        self.update_status(f"[*] Audio stream {status}.", False)
-        # If in FFmpeg mode and client is connected, restarting the stream applies the mute/unmute
-        if self.server.encoder_mode.startswith("FFmpeg") and self.server.is_running and self.server.client_conn:
-            # Restart ffmpeg stream to apply mute/unmute without full client disconnect
-            # This is an exception to the framerate rule, as mute/unmute is a stream property.
-            threading.Thread(target=self.server.restart_ffmpeg_stream, daemon=True).start()
-
-
-    def on_client_connected(self):
-        self.update_status("[*] Client is connected.", False)
-
-    def on_client_disconnected(self):
-        self.update_status("[*] Client disconnected.", False)
-
-    def on_server_stopped(self):
-        self.update_status("[*] Server has fully stopped.", False)
-
-    def on_server_startup_failed(self, error_message):
-        QMessageBox.critical(self, "Server Startup Error", f"Server failed to start: {error_message}")
-        self.update_status(f"[!] Server failed to start: {error_message}", True)
-        self.close() # Close window if server fails to start critically
-
-    def closeEvent(self, event):
-        """Handles graceful shutdown when the GUI window is closed."""
-        self.stop_server() # Ensure server stops before application exits
-        if self.tray_icon:
-            self.tray_icon.hide()
-        event.accept()
-
-    def changeEvent(self, event):
-        if platform.system() == "Linux" and hasattr(self, 'tray_icon') and self.tray_icon:
-            if event.type() == event.Type.WindowStateChange:
-                if self.isMinimized():
-                    self.hide()
-                    self.tray_icon.showMessage(
-                        "Remote Desktop Server",
-                        "Application minimized to tray.",
-                        QSystemTrayIcon.MessageIcon.Information,
-                        2000
-                    )
-        super().changeEvent(event)
-
-    def on_tray_icon_activated(self, reason):
-        if platform.system() == "Linux" and self.tray_icon:
-            if reason == QSystemTrayIcon.ActivationReason.Trigger:
-                # Toggle visibility on single click
-                if self.isVisible():
-                    self.hide()
-                else:
-                    self.showNormal()
-                    self.raise_()
-                    self.activateWindow()
+                self.server_thread.quit()
+                self.server_thread.wait(5000) # Wait up to 5 seconds for thread to finish
+                if self.server_thread.isRunning():
+                    self.update_status("[!] Server thread did not terminate gracefully. Force quitting.", True)
+                    self.server_thread.terminate() # Force terminate if it hangs
+
+        def update_status(self, message, is_error):
+            """Thread-safe method to update the status log in the GUI."""
+            # This slot is connected to a signal, so it runs in the main GUI thread.
+            color = "red" if is_error else "white"
+            self.status_log.append(f'<span style="color:{color};">{message}</span>')
+            # self.status_log.ensureCursorVisible() # Scrolls to bottom automatically
+
+        def update_encoder_mode(self, radio_id):
+            """Updates the server's encoder mode based on GUI selection."""
+            if radio_id == 0: # Legacy
+                mode = "Legacy (Slow)"
+                is_legacy = True
+            else: # FFmpeg
+                mode = self.ffmpeg_rb.text() # Use the detected label as the mode name
+                is_legacy = False
+
+            self.server.encoder_mode = mode
+
+            # Enable/disable JPEG quality slider based on mode
+            self.quality_slider.setEnabled(is_legacy)
+            self.quality_value_label.setEnabled(is_legacy)
+            # Update label for capture rate based on mode
+            self.rate_label.setText("JPEG Capture Rate (FPS):" if is_legacy else "FFmpeg Refresh Rate (FPS):")
+
+            # If server is running and mode changes between Legacy and FFmpeg, restart stream
+            # for in-session mode switching.
+            # Note: server._restart_media_streams is called from the server's thread
+            # if a client is connected. We just set the mode here.
+            pass
+
+            self.update_rate(self.server.screen_capture_rate) # Update label for rate based on new mode
+
+        def update_quality(self, value):
+            """Updates JPEG quality setting on the server."""
+            self.server.jpeg_quality = value
+            self.quality_value_label.setText(str(value))
+            # No restart needed for Legacy mode; it picks up changes on next frame.
+
+        def update_rate(self, value):
+            """Updates screen capture rate setting on the server."""
+            self.server.screen_capture_rate = value
+            self.rate_value_label.setText(str(value))
+            # IMPORTANT: For FFmpeg, rate changes only apply on connection establishment,
+            # or when explicitly restarting the stream (e.g., mute toggle).
+            # We DO NOT call server.restart_ffmpeg_stream directly here for FFmpeg,
+            # as per requirement "Make the framerate only apply when connection closes and goes back up for FFMPEG".
+            # So, for FFmpeg, we don't call restart_ffmpeg_stream here based on rate slider change.
+            pass # Do nothing, the next connection will pick up the new rate.
+
+
+        def toggle_mute(self, checked):
+            """Toggles audio mute setting on the server."""
+            self.server.is_muted = checked
+            status = "Muted" if checked else "Unmuted"
+            self.update_status(f"[*] Audio stream {status}.", False)
+            # If in FFmpeg mode and client is connected, restarting the stream applies the mute/unmute
+            if self.server.encoder_mode.startswith("FFmpeg") and self.server.is_running and self.server.client_conn:
+                # Restart ffmpeg stream to apply mute/unmute without full client disconnect
+                # This is an exception to the framerate rule, as mute/unmute is a stream property.
+                self.server.request_ffmpeg_restart()
+
+
+        def on_client_connected(self):
+            self.update_status("[*] Client is connected.", False)
+
+        def on_client_disconnected(self):
+            self.update_status("[*] Client disconnected.", False)
+
+        def on_server_stopped(self):
+            self.update_status("[*] Server has fully stopped.", False)
+
+        def on_server_startup_failed(self, error_message):
+            QMessageBox.critical(self, "Server Startup Error", f"Server failed to start: {error_message}")
+            self.update_status(f"[!] Server failed to start: {error_message}", True)
+            self.close() # Close window if server fails to start critically
+
+        def closeEvent(self, event):
+            """Handles graceful shutdown when the GUI window is closed."""
+            self.stop_server() # Ensure server stops before application exits
+            if self.tray_icon:
+                self.tray_icon.hide()
+            event.accept()
+
+        def changeEvent(self, event):
+            if platform.system() == "Linux" and hasattr(self, 'tray_icon') and self.tray_icon:
+                if event.type() == event.Type.WindowStateChange:
+                    if self.isMinimized():
+                        self.hide()
+                        self.tray_icon.showMessage(
+                            "Remote Desktop Server",
+                            "Application minimized to tray.",
+                            QSystemTrayIcon.MessageIcon.Information,
+                            2000
+                        )
+            super().changeEvent(event)
+
+        def on_tray_icon_activated(self, reason):
+            if platform.system() == "Linux" and self.tray_icon:
+                if reason == QSystemTrayIcon.ActivationReason.Trigger:
+                    # Toggle visibility on single click
+                    if self.isVisible():
+                        self.hide()
+                    else:
+                        self.showNormal()
+                        self.raise_()
+                        self.activateWindow()
 
 
-if __name__ == "__main__":
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setStyle("Fusion") # Better looking style
 